@@ -4,7 +4,8 @@ A bunch of caches.
 
 from mycache.nohashmap import Map
 from mycache.cache import Cache
-from mycache.decorators import cache
+from mycache.sharded import ShardedCache
+from mycache.decorators import cache, cache_many
 
 
-__all__ = ["cache", "Cache", "Map"]
+__all__ = ["cache", "cache_many", "Cache", "Map", "ShardedCache"]
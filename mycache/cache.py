@@ -4,37 +4,106 @@ with restrictions on total size and storage time
 and replacement of elements.
 """
 
+import heapq
+import os
+import pickle
+import sys
+import threading
+import time
+from copy import deepcopy
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
-from typing import Generic, Optional, TypeVar
-
-from mycache.nohashmap import Map
+from time import monotonic
+from typing import (
+    Any, Callable, Dict, Generic, Iterable, List,
+    Mapping, Optional, Tuple, TypeVar, Union
+)
+
+from mycache.clock import Clock, Duration, seconds
+from mycache.disk import DiskStore
+from mycache.nohashmap import Map, unhashable
 from mycache.policies import Policy, Random as RandomPolicy
+from mycache.recorder import Operation, TraceRecorder
+from mycache.singleflight import SingleFlight
+from mycache.stats import CacheStats
 
 
 Key = TypeVar("Key")
 Value = TypeVar("Value")
+Weigher = Callable[[Any, Any], float]
+
+# Default of `get`, which makes it raise `KeyError`
+_RAISE: Any = object()
+# Result of `get` for missing items, as no value can be it
+_ABSENT: Any = object()
+
+# Items are pickled in batches, so snapshot is written and read
+# in constant memory, but without per-item overhead
+_SNAPSHOT_VERSION = 1
+_SNAPSHOT_BATCH = 1024
+
+# Enum attribute lookup is slow for the hot path
+_GET, _HAS, _SAVE, _REMOVE = (
+    Operation.GET, Operation.HAS, Operation.SAVE, Operation.REMOVE
+)
+
+
+def sizeof(key: Any, value: Any) -> float:
+    """
+    Default weigher, estimates memory used by item in bytes.
+    Size of objects referenced by containers is not counted.
+    """
+
+    return sys.getsizeof(key) + sys.getsizeof(value)
 
 
-@dataclass
 class CacheItem(Generic[Value]):
     """
-    Cache item, containing value and metadata, such as:
-    cache hits, last access time, expiration time, etc.
+    Cache item, containing value, its expiration time
+    and key, it's stored for.
+
+    Items without expiration time are cached as bare values,
+    others have an item per key, so it has no `__dict__`.
+    Items are ordered by `expire_at`.
     """
 
-    value: Value
-    expire_at: Optional[datetime]
+    __slots__ = ("value", "expire_at", "key")
+
+    def __init__(
+        self,
+        value: Value,
+        expire_at: Optional[float],
+        key: Any = None,
+    ) -> None:
+        self.value = value
+        self.expire_at = expire_at
+        self.key = key
+
+    def __repr__(self) -> str:
+        return (
+            f"CacheItem(value={self.value!r}, expire_at={self.expire_at!r})"
+        )
 
-    def expired(self) -> bool:
+    def __lt__(self, other: "CacheItem[Value]") -> bool:
+        return self.expire_at < other.expire_at  # type: ignore
+
+    def expired(self, now: float) -> bool:
         """
-        Checks if item is expired.
+        Checks if item is expired at `now`.
         """
 
         if self.expire_at is None:
             return False
 
-        return datetime.now() >= self.expire_at
+        return now >= self.expire_at
+
+
+def _value(entry: Any) -> Any:
+    # Items without expiration time are stored as is
+    return entry.value if type(entry) is CacheItem else entry
+
+
+def _expire_at(entry: Any) -> Optional[float]:
+    return entry.expire_at if type(entry) is CacheItem else None
 
 
 @dataclass
@@ -43,15 +112,63 @@ class Cache(Generic[Key, Value]):
     Dictionary-like collection
     with restrictions on total size and storage time
     and replacement of elements.
+
+    Expiration is measured by `clock`, monotonic clock by default.
+    Total weight of items, measured by `weigher`,
+    is restricted by `max_weight`, if it's set.
+    Lookups with `get` and `get_many` are counted in `stats`.
+    Operations are recorded by `recorder`, if it's set.
+    Evicted items are moved to `disk` tier, if it's set,
+    and lookups missing in memory fall back to it.
     """
 
     copy_keys: bool = True
     max_items: Optional[int] = None
     replacement_policy: Policy[Key] = field(default_factory=RandomPolicy)
-    _map: Map[Key, CacheItem[Value]] = field(init=False)
+    clock: Optional[Clock] = None
+    max_weight: Optional[float] = None
+    weigher: Weigher = sizeof
+    recorder: Optional[TraceRecorder] = None
+    disk: Optional[DiskStore] = None
+    _weight: float = field(init=False, default=0)
+    _hits: int = field(init=False, default=0, repr=False)
+    _misses: int = field(init=False, default=0, repr=False)
+    _inserts: int = field(init=False, default=0, repr=False)
+    _evictions: int = field(init=False, default=0, repr=False)
+    _expired_items: int = field(init=False, default=0, repr=False)
+    # Values of items or `CacheItem` for items with expiration time
+    _map: Map[Key, Any] = field(init=False)
+    # Weights of items, if cache has `max_weight`
+    _weights: Map[Key, float] = field(init=False, repr=False)
+    _expirations: List[CacheItem[Value]] = field(init=False)
+    _lock: Any = field(
+        init=False, repr=False, compare=False, default_factory=threading.Lock,
+    )
+    _flight: SingleFlight[Key, Value] = field(
+        init=False, repr=False, compare=False, default_factory=SingleFlight,
+    )
 
     def __post_init__(self) -> None:
-        self._map = Map(copy_keys=self.copy_keys)
+        # Keys are copied in `save`, so map and policy share them
+        self._map = Map(copy_keys=False)
+        self._weights = Map(copy_keys=False)
+        self.replacement_policy.set_capacity(self.max_items)
+
+        # Min-heap of items with `expire_at` ordered by expiration time.
+        # Removed and updated items stay in heap
+        # until they are popped or heap is compacted
+        self._expirations = []
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Locks can't be pickled, so copies get their own
+        state = self.__dict__.copy()
+        del state["_lock"], state["_flight"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
 
     def has(self, key: Key) -> bool:
         """
@@ -59,20 +176,99 @@ class Cache(Generic[Key, Value]):
         """
 
         self.replacement_policy.access(key)
-        return key in self._map and not self._map[key].expired()
 
-    def get(self, key: Key) -> Value:
+        try:
+            item = self._map[key]
+        except KeyError:
+            found = self.disk is not None and self.disk.has(key, self.__now())
+        else:
+            found = not self.__expired(item)
+
+        if self.recorder is not None:
+            self.recorder.record(_HAS, key, found)
+
+        return found
+
+    def get(self, key: Key, default: Any = _RAISE) -> Value:
         """
-        Returns cached item for `key`
+        Returns cached item for `key` or `default`, if it's given,
         or raises `KeyError` if item is expired.
         """
 
-        item = self._map[key]
-        if item.expired():
-            raise KeyError(key)
+        try:
+            item = self._map[key]
+        except KeyError:
+            return self.__get_from_disk(key, default)
+
+        if type(item) is CacheItem:
+            if self.__expired(item):
+                return self.__get_from_disk(key, default)
+            item = item.value
+
+        self._hits += 1
+        if self.recorder is not None:
+            self.recorder.record(_GET, key, True)
 
         self.replacement_policy.access(key)
-        return item.value
+        return item
+
+    def peek(self, key: Key, default: Any = None) -> Any:
+        """
+        Returns cached item for `key` or `default`,
+        without counting lookup and updating replacement policy.
+        """
+
+        try:
+            item = self._map[key]
+        except KeyError:
+            pass
+        else:
+            if not self.__expired(item):
+                return _value(item)
+
+        if self.disk is not None:
+            try:
+                return self.disk.get(key, self.__now(), copy=True)
+            except KeyError:
+                pass
+
+        return default
+
+    def get_or_load(
+        self,
+        key: Key,
+        loader: Callable[[], Value],
+        expire_in: Optional[Duration] = None,
+    ) -> Value:
+        """
+        Returns cached item for `key` or saves and returns
+        result of `loader`, if item is not cached or expired.
+
+        Calls from many threads are safe against each other
+        and call `loader` at most once at a time for the same key,
+        other callers wait for its result.
+        """
+
+        with self._lock:
+            value = self.get(key, _ABSENT)
+
+        if value is not _ABSENT:
+            return value
+
+        def load() -> Value:
+            with self._lock:
+                # Another call could save it right before this one
+                value = self.peek(key, _ABSENT)
+            if value is not _ABSENT:
+                return value
+
+            value = loader()
+            with self._lock:
+                self.save(key, value, expire_in)
+
+            return value
+
+        return self._flight.do(key, load)
 
     def size(self) -> int:
         """
@@ -81,6 +277,35 @@ class Cache(Generic[Key, Value]):
 
         return len(self._map)
 
+    def weight(self) -> float:
+        """
+        Returns total weight of items in cache.
+        """
+
+        return self._weight
+
+    def stats(self) -> CacheStats:
+        """
+        Returns snapshot of cache counters.
+        """
+
+        return CacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            inserts=self._inserts,
+            evictions=self._evictions,
+            expirations=self._expired_items,
+            size=self.size(),
+        )
+
+    def reset_stats(self) -> None:
+        """
+        Sets cache counters to zero.
+        """
+
+        self._hits = self._misses = self._inserts = 0
+        self._evictions = self._expired_items = 0
+
     def full(self) -> bool:
         """
         Checks if cache is full.
@@ -96,26 +321,20 @@ class Cache(Generic[Key, Value]):
         self,
         key: Key,
         value: Value,
-        expire_in: Optional[timedelta] = None,
+        expire_in: Optional[Duration] = None,
     ) -> None:
         """
         Adds item to cache.
-        Replaces item if cache size exceed `self._max_items`.
+        Replaces item if cache size exceed `self._max_items`
+        or total weight exceed `self.max_weight`.
+        Item heavier than `self.max_weight` is not saved at all.
+        `expire_in` is `timedelta` or number of seconds.
         """
 
-        if self.full():
-            self.__remove_expired_items()
+        if self.recorder is not None:
+            self.recorder.record(_SAVE, key, key in self._map)
 
-        if self.full():
-            key_to_remove = self.replacement_policy.next_to_replace()
-            self.remove(key_to_remove)
-
-        expire_at: Optional[datetime] = None
-        if expire_in is not None:
-            expire_at = datetime.now() + expire_in
-
-        self.replacement_policy.add(key)
-        self._map[key] = CacheItem(value, expire_at)
+        self.__save(key, value, self.__expire_at(expire_in))
 
     def remove(self, key: Key) -> None:
         """
@@ -123,15 +342,408 @@ class Cache(Generic[Key, Value]):
         Raises `KeyError` if there are no such item.
         """
 
+        on_disk = self.disk is not None and self.disk.discard(key)
+        if self.recorder is not None:
+            self.recorder.record(_REMOVE, key, on_disk or key in self._map)
+
+        # Items in memory are never on disk
+        if not on_disk:
+            self.__remove(key)
+
+    def get_many(
+        self,
+        keys: Iterable[Key],
+    ) -> Tuple[Map[Key, Value], List[Key]]:
+        """
+        Returns cached items for `keys` and list of keys
+        those are not cached or expired.
+        """
+
+        found: Map[Key, Value] = Map(copy_keys=False)
+        missing: List[Key] = []
+        now = self.__now()
+
+        for key in keys:
+            try:
+                item = self._map[key]
+            except KeyError:
+                missing.append(key)
+                continue
+
+            if type(item) is CacheItem and item.expired(now):
+                missing.append(key)
+                continue
+
+            self.replacement_policy.access(key)
+            found[key] = _value(item)
+
+        if self.disk is not None and missing:
+            not_on_disk = []
+            for key in missing:
+                if self.disk.has(key, now):
+                    found[key] = self.__promote(self.disk, key, now)
+                else:
+                    not_on_disk.append(key)
+
+            missing = not_on_disk
+
+        self._hits += len(found)
+        self._misses += len(missing)
+
+        if self.recorder is not None:
+            for key in found:
+                self.recorder.record(_GET, key, True)
+            for key in missing:
+                self.recorder.record(_GET, key, False)
+
+        return found, missing
+
+    def save_many(
+        self,
+        items: Union[Mapping[Key, Value], Iterable[Tuple[Key, Value]]],
+        expire_in: Optional[Duration] = None,
+    ) -> None:
+        """
+        Adds items to cache.
+        Cache is purged of expired items at most once
+        and replaces just enough items to fit the new ones.
+        If there are more items than `max_items`, only last are saved.
+        Cache with `max_weight` saves items one by one.
+        """
+
+        batch: Map[Key, Value] = Map(copy_keys=False)
+        pairs = items.items() if isinstance(items, Mapping) else items
+        for key, value in pairs:
+            batch[key] = value
+
+        if self.max_weight is not None:
+            for key, value in batch.items():
+                self.save(key, value, expire_in)
+
+            return
+
+        if self.recorder is not None:
+            for key in batch:
+                self.recorder.record(_SAVE, key, key in self._map)
+
+        if self.max_items is not None:
+            self.__make_room(batch, self.max_items)
+
+        expire_at = self.__expire_at(expire_in)
+        for key, value in batch.items():
+            self.__insert(key, value, expire_at, 0)
+
+    def remove_many(self, keys: Iterable[Key]) -> None:
+        """
+        Removes items with `keys` from the cache.
+        Keys those are not cached are ignored.
+        """
+
+        for key in keys:
+            if key in self._map or self.disk is not None and key in self.disk:
+                self.remove(key)
+
+    def dump(self, path: str) -> int:
+        """
+        Writes snapshot of cache to file at `path`
+        and returns count of written items.
+
+        Items are written in order of replacement policy
+        with time left till their expiration,
+        so cache restored with `load` in other process
+        replaces and expires them as this one would.
+        Values and keys must be picklable.
+        """
+
+        self.__remove_expired_items()
+        now = self.__now()
+        keys = self.replacement_policy.order()
+        temporary_path = path + ".tmp"
+
+        with open(temporary_path, "wb") as snapshot:
+            pickler = pickle.Pickler(snapshot, pickle.HIGHEST_PROTOCOL)
+            pickler.dump((_SNAPSHOT_VERSION, time.time(), self.size()))
+
+            batch = []
+            for key in self._map if keys is None else keys:
+                item = self._map[key]
+                expire_in = None
+                expire_at = _expire_at(item)
+                if expire_at is not None:
+                    expire_in = expire_at - now
+
+                batch.append((key, _value(item), expire_in))
+                if len(batch) == _SNAPSHOT_BATCH:
+                    pickler.dump(batch)
+                    pickler.clear_memo()
+                    batch = []
+
+            pickler.dump(batch)
+
+        # Readers never see a partially written snapshot
+        os.replace(temporary_path, path)
+        return self.size()
+
+    def load(self, path: str) -> int:
+        """
+        Adds items from snapshot written by `dump`
+        and returns count of added items.
+
+        Items are added in bulk, without purging and replacing items
+        one by one. Items expired since the snapshot was written
+        are skipped, as are the first ones to be replaced,
+        if snapshot has more than `max_items` items.
+        """
+
+        loaded = 0
+        now = self.__now()
+
+        with open(path, "rb") as snapshot:
+            unpickler = pickle.Unpickler(snapshot)
+            header = unpickler.load()
+            if not isinstance(header, tuple) or header[0] != _SNAPSHOT_VERSION:
+                raise ValueError(f"{path} is not a cache snapshot")
+
+            _, dumped_at, count = header
+            elapsed = max(0.0, time.time() - dumped_at)
+            skip = 0
+            if self.max_items is not None:
+                skip = max(0, count - self.max_items)
+
+            while True:
+                try:
+                    batch = unpickler.load()
+                except EOFError:
+                    break
+
+                for key, value, expire_in in batch:
+                    if skip > 0:
+                        skip -= 1
+                        continue
+
+                    expire_at = None
+                    if expire_in is not None:
+                        expire_in -= elapsed
+                        if expire_in <= 0:
+                            continue
+                        expire_at = now + expire_in
+
+                    weight: float = 0
+                    if self.max_weight is not None:
+                        weight = self.weigher(key, value)
+
+                    # Unpickled key is not shared with anyone
+                    self.__insert(key, value, expire_at, weight, False)
+                    loaded += 1
+
+        self.__trim()
+        return loaded
+
+    def __save(
+        self,
+        key: Key,
+        value: Value,
+        expire_at: Optional[float],
+    ) -> None:
+        weight: float = 0
+        if self.max_weight is not None:
+            weight = self.weigher(key, value)
+            if weight > self.max_weight:
+                # Item will never fit, old value mustn't stay either
+                if key in self._map:
+                    self.__remove(key)
+                if self.disk is not None:
+                    self.disk.discard(key)
+                return
+
+        if key not in self._map:
+            if self.full():
+                self.__remove_expired_items()
+
+            if self.full():
+                key_to_remove = self.replacement_policy.next_to_replace()
+                if not self.replacement_policy.admit(key, key_to_remove):
+                    # Rejected item is evicted right away
+                    if self.disk is not None:
+                        self.disk.save(key, value, expire_at)
+                    return
+
+                self.__evict(key_to_remove)
+
+        if self.max_weight is not None:
+            self.__make_weight_room(key, weight, self.max_weight)
+
+        self.__insert(key, value, expire_at, weight)
+
+    def __remove(self, key: Key) -> None:
         self.replacement_policy.remove(key)
         del self._map[key]
+        if self.max_weight is not None:
+            self._weight -= self._weights.pop(key)
+
+    def __evict(self, key: Key) -> None:
+        if self.disk is not None:
+            item = self._map[key]
+            if not self.__expired(item):
+                self.disk.save(key, _value(item), _expire_at(item))
+
+        self.__remove(key)
+        self._evictions += 1
+
+    def __get_from_disk(self, key: Key, default: Any) -> Value:
+        now = self.__now()
+        if self.disk is None or not self.disk.has(key, now):
+            self.__miss(key)
+            if default is _RAISE:
+                raise KeyError(key)
+
+            return default  # type: ignore
+
+        value = self.__promote(self.disk, key, now)
+        self._hits += 1
+        if self.recorder is not None:
+            self.recorder.record(_GET, key, True)
+
+        return value
+
+    def __promote(self, disk: DiskStore, key: Key, now: float) -> Value:
+        value, expire_at = disk.pop(key, now)
+        self.__save(key, value, expire_at)
+        return value
+
+    def __miss(self, key: Key) -> None:
+        self._misses += 1
+        if self.recorder is not None:
+            self.recorder.record(_GET, key, False)
+
+    def __make_room(self, batch: Map[Key, Value], max_items: int) -> None:
+        for key in list(batch)[:-max_items or None]:
+            del batch[key]
+
+        if self.size() + len(batch) <= max_items:
+            return
+
+        self.__remove_expired_items()
+        cached_keys = [key for key in batch if key in self._map]
+        overflow = self.size() - len(cached_keys) + len(batch) - max_items
+        if overflow <= 0:
+            return
+
+        # Items from batch mustn't be replaced,
+        # so they are removed and inserted again as new ones
+        for key in cached_keys:
+            self.__remove(key)
+        self._inserts -= len(cached_keys)
+
+        for _ in range(overflow):
+            self.__evict(self.replacement_policy.next_to_replace())
+
+    def __make_weight_room(
+        self,
+        key: Key,
+        weight: float,
+        max_weight: float,
+    ) -> None:
+        if not self.__overweight(key, weight, max_weight):
+            return
+
+        self.__remove_expired_items()
+        while self.__overweight(key, weight, max_weight):
+            key_to_remove = self.replacement_policy.next_to_replace()
+            self.__evict(key_to_remove)
+
+    def __trim(self) -> None:
+        # Cache, which wasn't empty before load, may overflow
+        while self.max_items is not None and self.size() > self.max_items:
+            self.__evict(self.replacement_policy.next_to_replace())
+
+        while self.max_weight is not None and self._weight > self.max_weight:
+            self.__evict(self.replacement_policy.next_to_replace())
+
+    def __overweight(self, key: Key, weight: float, max_weight: float) -> bool:
+        replaced_weight: float = 0
+        if key in self._map:
+            replaced_weight = self._weights[key]
+
+        return self._weight - replaced_weight + weight > max_weight
+
+    def __insert(
+        self,
+        key: Key,
+        value: Value,
+        expire_at: Optional[float],
+        weight: float,
+        copy_key: bool = True,
+    ) -> None:
+        if key in self._map:
+            # Item is updated, so there is nothing to replace
+            self.replacement_policy.access(key)
+            if self.max_weight is not None:
+                self._weight -= self._weights[key]
+        else:
+            if copy_key and self.copy_keys and unhashable(key):
+                key = deepcopy(key)
+            if self.disk is not None:
+                self.disk.discard(key)
+
+            self.replacement_policy.add(key)
+            self._inserts += 1
+
+        if self.max_weight is not None:
+            self._weights[key] = weight
+            self._weight += weight
+
+        if expire_at is None and type(value) is not CacheItem:
+            self._map[key] = value
+            return
+
+        item = CacheItem(value, expire_at, key)
+        self._map[key] = item
+        if expire_at is not None:
+            self.__index_expiration(item)
+
+    def __expire_at(self, expire_in: Optional[Duration]) -> Optional[float]:
+        if expire_in is None:
+            return None
+
+        return self.__now() + seconds(expire_in)  # type: ignore
+
+    def __index_expiration(self, item: CacheItem[Value]) -> None:
+        if len(self._expirations) > 2 * self.size() + 16:
+            self.__compact_expirations()
+
+        heapq.heappush(self._expirations, item)
+
+    def __compact_expirations(self) -> None:
+        self._expirations = [
+            item for item in self._expirations if self.__indexed(item)
+        ]
+        heapq.heapify(self._expirations)
+
+    def __now(self) -> float:
+        # `monotonic` is looked up on every call, so it can be patched
+        if self.clock is None:
+            return monotonic()
+
+        return self.clock()
+
+    def __expired(self, item: Any) -> bool:
+        return (
+            type(item) is CacheItem
+            and item.expire_at is not None
+            and item.expired(self.__now())
+        )
+
+    def __indexed(self, item: CacheItem[Value]) -> bool:
+        return self._map.get(item.key) is item
 
     def __remove_expired_items(self) -> None:
-        keys_to_remove = []
+        now = self.__now()
+        expirations = self._expirations
 
-        for key, item in self._map.items():
-            if item.expired():
-                keys_to_remove.append(key)
+        while expirations and expirations[0].expire_at <= now:  # type: ignore
+            item = heapq.heappop(expirations)
 
-        for key in keys_to_remove:
-            self.remove(key)
+            if self.__indexed(item):
+                self.__remove(item.key)
+                self._expired_items += 1
@@ -0,0 +1,75 @@
+"""
+Time sources for expiration of cached items.
+"""
+
+import threading
+from datetime import timedelta
+from time import monotonic
+from typing import Callable, Optional, Union
+
+
+Clock = Callable[[], float]
+Duration = Union[timedelta, float]
+
+
+def seconds(duration: Optional[Duration]) -> Optional[float]:
+    """
+    Converts `timedelta` or number of seconds to seconds.
+    """
+
+    if duration is None:
+        return None
+
+    if isinstance(duration, timedelta):
+        return duration.total_seconds()
+
+    return float(duration)
+
+
+class ManualClock:
+    """
+    Clock which moves only when asked to.
+    Useful for testing expiration.
+    """
+
+    def __init__(self, now: float = 0.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, duration: Duration) -> None:
+        """
+        Moves clock forward by `duration`.
+        """
+
+        self.now += seconds(duration)  # type: ignore
+
+
+class CoarseClock:
+    """
+    Monotonic clock updated by background thread every `resolution` seconds.
+    Reading it is just an attribute access.
+    """
+
+    def __init__(self, resolution: float = 0.001) -> None:
+        self.now = monotonic()
+        self._resolution = resolution
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self.__tick, daemon=True)
+        self._thread.start()
+
+    def __call__(self) -> float:
+        return self.now
+
+    def stop(self) -> None:
+        """
+        Stops background thread, clock won't move anymore.
+        """
+
+        self._stopped.set()
+        self._thread.join()
+
+    def __tick(self) -> None:
+        while not self._stopped.wait(self._resolution):
+            self.now = monotonic()
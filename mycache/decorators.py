@@ -2,40 +2,538 @@
 Some useful caching decorators.
 """
 
-from datetime import timedelta
-from functools import wraps
-from typing import Any, Callable, Optional
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 from mycache.cache import Cache
+from mycache.clock import Clock, Duration, seconds
+from mycache.nohashmap import Map
+from mycache.singleflight import SingleFlight
+from mycache.stats import LatencyHistogram
 
 
 Fany = Callable[..., Any]
 Decorator = Callable[[Fany], Fany]
 
 
+class _KwargsMark:
+    """
+    Separates positional and keyword arguments in keys.
+    Survives pickling, so keys can be stored outside of process.
+    """
+
+    def __repr__(self) -> str:
+        return "KWARGS_MARK"
+
+    def __reduce__(self) -> str:
+        return "KWARGS_MARK"
+
+
+KWARGS_MARK = _KwargsMark()
+_FAST_TYPES = frozenset([int, str])
+# Result of `_peek` for missing items
+_ABSENT: Any = object()
+
+
+class _Refreshable:
+    """
+    Cached result, which has to be refreshed after `refresh_at`.
+    """
+
+    __slots__ = ("value", "refresh_at")
+
+    def __init__(self, value: Any, refresh_at: float) -> None:
+        self.value = value
+        self.refresh_at = refresh_at
+
+    def __reduce__(self) -> Any:
+        return _Refreshable, (self.value, self.refresh_at)
+
+
+class _Refresh:
+    """
+    Schedule of refreshing cached results.
+    """
+
+    def __init__(
+        self,
+        expire_in: Optional[Duration],
+        refresh_after: Optional[Duration],
+        stale_ttl: Optional[Duration],
+        clock: Optional[Clock],
+    ) -> None:
+        if refresh_after is None and (expire_in is None or stale_ttl is None):
+            raise ValueError("refresh_after or expire_in with stale_ttl")
+
+        fresh_for = expire_in if refresh_after is None else refresh_after
+        self.fresh_for: float = seconds(fresh_for)  # type: ignore
+        self.clock = clock
+
+        # Expired results are still served for `stale_ttl`
+        self.expire_in = seconds(expire_in)
+        if self.expire_in is not None:
+            self.expire_in += seconds(stale_ttl) or 0.0
+
+    def wrap(self, value: Any) -> _Refreshable:
+        """
+        Returns `value` to be refreshed when it stops being fresh.
+        """
+
+        return _Refreshable(value, self.now() + self.fresh_for)
+
+    def due(self, entry: _Refreshable) -> bool:
+        """
+        Checks if `entry` has to be refreshed.
+        """
+
+        return self.now() >= entry.refresh_at
+
+    def now(self) -> float:
+        """
+        Returns current time, wall-clock time by default,
+        so results restored from snapshot aren't fresh forever.
+        """
+
+        if self.clock is None:
+            return time.time()
+
+        return self.clock()
+
+
+def make_key(
+    args: Tuple[Any, ...],
+    kwargs: Dict[str, Any],
+    typed: bool = False,
+) -> Any:
+    """
+    Makes flat key from function arguments.
+
+    Key is hashable if all arguments are hashable,
+    otherwise it will be stored by `Map` as unhashable one.
+    Order of keyword arguments doesn't matter.
+    """
+
+    key = args
+    if kwargs:
+        items = sorted(kwargs.items())
+        key += (KWARGS_MARK,)
+        for item in items:
+            key += item
+
+    if typed:
+        key += tuple([type(value) for value in args])
+        if kwargs:
+            key += tuple([type(value) for _, value in items])
+    elif len(key) == 1 and type(key[0]) in _FAST_TYPES:
+        return key[0]
+
+    return key
+
+
 def cache(
-    expire_in: Optional[timedelta] = None,
+    expire_in: Optional[Duration] = None,
+    typed: bool = False,
+    key: Optional[Fany] = None,
+    single_flight: bool = False,
+    latency_histogram: bool = False,
+    backend: Any = None,
+    refresh_after: Optional[Duration] = None,
+    stale_ttl: Optional[Duration] = None,
+    refresh_workers: int = 4,
     **kwargs: Any,
 ) -> Decorator:
     """
     Make function results cachable between calls.
+
+    With `typed` arguments of different types are cached separately,
+    so `f(1)` and `f(1.0)` are different calls.
+    `key` is a function to build keys from call arguments.
+    With `single_flight` concurrent calls with the same arguments
+    wait for the first one and share its result or exception.
+
+    Results of coroutine functions are awaited before caching
+    and concurrent awaiters of the same arguments share one task.
+    Other arguments, such as `max_items`, `clock` or `recorder`,
+    are passed to `Cache`. Results are saved in `backend` instead,
+    if it's given, such as `SharedCache` shared between processes.
+
+    Like `functools.lru_cache`, decorated function has
+    `cache_stats()` and `cache_reset_stats()` methods.
+    With `latency_histogram` time spent in function on cache misses
+    is recorded in `cache_latency` histogram.
+    Cached results are saved with `cache_dump(path)`
+    and restored after restart with `cache_load(path)`.
+
+    Results older than `refresh_after` are returned at once,
+    while function is called again in background to refresh them.
+    With `stale_ttl` results expired by `expire_in` are served
+    and refreshed that much longer, `expire_in` is the default
+    of `refresh_after` then. One refresh per arguments runs
+    at a time, on one of `refresh_workers` threads,
+    or as a task for coroutine functions.
     """
 
+    refresh: Optional[_Refresh] = None
+    if refresh_after is not None or stale_ttl is not None:
+        refresh = _Refresh(
+            expire_in, refresh_after, stale_ttl, kwargs.get("clock"),
+        )
+
     def decorator(function: Fany) -> Fany:
-        memo: Cache[Any, Any] = Cache(**kwargs)
+        memo: Cache[Any, Any] = \
+            Cache(**kwargs) if backend is None else backend
+        histogram = LatencyHistogram() if latency_histogram else None
+        load_function = _timed(function, histogram)
+
+        def make_call_key(
+            args: Tuple[Any, ...],
+            kwargs: Dict[str, Any],
+        ) -> Any:
+            if key is None:
+                return make_key(args, kwargs, typed)
+
+            return key(*args, **kwargs)
+
+        if refresh is not None:
+            if asyncio.iscoroutinefunction(function):
+                refreshing_wrapper = _refreshing_coroutine_wrapper(
+                    load_function, memo, make_call_key, refresh,
+                )
+            else:
+                refreshing_wrapper = _refreshing_wrapper(
+                    load_function, memo, make_call_key, refresh,
+                    single_flight, refresh_workers,
+                )
+
+            return _expose_cache(
+                wraps(function)(refreshing_wrapper), memo, histogram,
+            )
+
+        if asyncio.iscoroutinefunction(function):
+            coroutine_wrapper = _coroutine_wrapper(
+                load_function, memo, make_call_key, expire_in,
+            )
+            return _expose_cache(coroutine_wrapper, memo, histogram)
 
         @wraps(function)
         def wrapper(*args: Any, **kwargs: Any) -> Any:
-            key = (args, kwargs)
+            call_key = make_call_key(args, kwargs)
+
             try:
-                return memo.get(key)
+                return memo.get(call_key)
             except KeyError:
                 pass  # item not in cache, lets add it and return
 
-            result = function(*args, **kwargs)
-            memo.save(key, result, expire_in=expire_in)
+            result = load_function(*args, **kwargs)
+            memo.save(call_key, result, expire_in=expire_in)
             return result
 
-        return wrapper
+        if not single_flight:
+            return _expose_cache(wrapper, memo, histogram)
+
+        memo_lock = threading.Lock()
+        flight: SingleFlight[Any, Any] = SingleFlight()
+
+        @wraps(function)
+        def single_flight_wrapper(*args: Any, **kwargs: Any) -> Any:
+            call_key = make_call_key(args, kwargs)
+
+            with memo_lock:
+                try:
+                    return memo.get(call_key)
+                except KeyError:
+                    pass  # item not in cache, lets compute it once
+
+            def load() -> Any:
+                with memo_lock:
+                    # Another call could finish right before this one
+                    result = _peek(memo, call_key)
+                if result is not _ABSENT:
+                    return result
+
+                result = load_function(*args, **kwargs)
+                with memo_lock:
+                    memo.save(call_key, result, expire_in=expire_in)
+
+                return result
+
+            return flight.do(call_key, load)
+
+        return _expose_cache(single_flight_wrapper, memo, histogram)
+
+    return decorator
+
+
+def _timed(function: Fany, histogram: Optional[LatencyHistogram]) -> Fany:
+    if histogram is None:
+        return function
+
+    if asyncio.iscoroutinefunction(function):
+        @wraps(function)
+        async def timed_coroutine(*args: Any, **kwargs: Any) -> Any:
+            start = perf_counter()
+            try:
+                return await function(*args, **kwargs)
+            finally:
+                histogram.record(perf_counter() - start)
+
+        return timed_coroutine
+
+    @wraps(function)
+    def timed(*args: Any, **kwargs: Any) -> Any:
+        start = perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            histogram.record(perf_counter() - start)
+
+    return timed
+
+
+def _expose_cache(
+    wrapper: Fany,
+    memo: Cache[Any, Any],
+    histogram: Optional[LatencyHistogram],
+) -> Fany:
+    def reset_stats() -> None:
+        memo.reset_stats()
+        if histogram is not None:
+            histogram.reset()
+
+    wrapper.cache_stats = memo.stats  # type: ignore
+    wrapper.cache_reset_stats = reset_stats  # type: ignore
+    wrapper.cache_latency = histogram  # type: ignore
+    # Only `Cache` has snapshots
+    wrapper.cache_dump = getattr(memo, "dump", None)  # type: ignore
+    wrapper.cache_load = getattr(memo, "load", None)  # type: ignore
+    return wrapper
+
+
+def _peek(memo: Cache[Any, Any], key: Any) -> Any:
+    peek = getattr(memo, "peek", None)
+    if peek is not None:
+        return peek(key, _ABSENT)
+
+    # Backends without `peek` count this lookup
+    try:
+        return memo.get(key)
+    except KeyError:
+        return _ABSENT
+
+
+def _coroutine_wrapper(
+    function: Fany,
+    memo: Cache[Any, Any],
+    make_call_key: Fany,
+    expire_in: Optional[Duration],
+) -> Fany:
+    tasks: Map[Any, "asyncio.Future[Any]"] = Map(copy_keys=False)
+
+    async def load(call_key: Any, args: Any, kwargs: Any) -> Any:
+        result = await function(*args, **kwargs)
+        memo.save(call_key, result, expire_in=expire_in)
+        return result
+
+    def forget(call_key: Any, task: "asyncio.Future[Any]") -> None:
+        if call_key in tasks and tasks[call_key] is task:
+            del tasks[call_key]
+
+        if not task.cancelled():
+            # Mark exception as retrieved, awaiters could be cancelled
+            task.exception()
+
+    @wraps(function)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        call_key = make_call_key(args, kwargs)
+
+        try:
+            return memo.get(call_key)
+        except KeyError:
+            pass  # item not in cache, lets await it
+
+        try:
+            task = tasks[call_key]
+        except KeyError:
+            task = asyncio.ensure_future(load(call_key, args, kwargs))
+            task.add_done_callback(partial(forget, call_key))
+            tasks[call_key] = task
+
+        # Cancellation of one awaiter mustn't cancel others
+        return await asyncio.shield(task)
+
+    return wrapper
+
+
+def _refreshing_wrapper(
+    function: Fany,
+    memo: Cache[Any, Any],
+    make_call_key: Fany,
+    refresh: _Refresh,
+    single_flight: bool,
+    refresh_workers: int,
+) -> Fany:
+    # Memo is shared with refreshing threads
+    memo_lock = threading.Lock()
+    refreshing: Map[Any, None] = Map(copy_keys=False)
+    flight: SingleFlight[Any, Any] = SingleFlight()
+    executor = ThreadPoolExecutor(
+        refresh_workers, thread_name_prefix="mycache-refresh",
+    )
+
+    def load(call_key: Any, args: Any, kwargs: Any) -> Any:
+        result = function(*args, **kwargs)
+        with memo_lock:
+            memo.save(call_key, refresh.wrap(result), refresh.expire_in)
+
+        return result
+
+    def reload(call_key: Any, args: Any, kwargs: Any) -> None:
+        try:
+            load(call_key, args, kwargs)
+        except Exception:  # pylint: disable=broad-except
+            pass  # stale result is served till it expires, or next refresh
+        finally:
+            with memo_lock:
+                del refreshing[call_key]
+
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        call_key = make_call_key(args, kwargs)
+
+        with memo_lock:
+            try:
+                entry = memo.get(call_key)
+            except KeyError:
+                entry = None
+
+            due = entry is not None and refresh.due(entry) \
+                and call_key not in refreshing
+            if due:
+                refreshing[call_key] = None
+
+        if due:
+            executor.submit(reload, call_key, args, kwargs)
+
+        if entry is not None:
+            return entry.value
+
+        if single_flight:
+            return flight.do(call_key, partial(load, call_key, args, kwargs))
+
+        return load(call_key, args, kwargs)
+
+    return wrapper
+
+
+def _refreshing_coroutine_wrapper(
+    function: Fany,
+    memo: Cache[Any, Any],
+    make_call_key: Fany,
+    refresh: _Refresh,
+) -> Fany:
+    tasks: Map[Any, "asyncio.Future[Any]"] = Map(copy_keys=False)
+    refreshing: Map[Any, "asyncio.Future[Any]"] = Map(copy_keys=False)
+
+    async def load(call_key: Any, args: Any, kwargs: Any) -> Any:
+        result = await function(*args, **kwargs)
+        memo.save(call_key, refresh.wrap(result), refresh.expire_in)
+        return result
+
+    def forget(
+        running: Map[Any, "asyncio.Future[Any]"],
+        call_key: Any,
+        task: "asyncio.Future[Any]",
+    ) -> None:
+        if call_key in running and running[call_key] is task:
+            del running[call_key]
+
+        if not task.cancelled():
+            # Failed refresh keeps stale result, it's retried next time
+            task.exception()
+
+    def start(
+        running: Map[Any, "asyncio.Future[Any]"],
+        call_key: Any,
+        args: Any,
+        kwargs: Any,
+    ) -> "asyncio.Future[Any]":
+        task = asyncio.ensure_future(load(call_key, args, kwargs))
+        task.add_done_callback(partial(forget, running, call_key))
+        running[call_key] = task
+        return task
+
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        call_key = make_call_key(args, kwargs)
+
+        try:
+            entry = memo.get(call_key)
+        except KeyError:
+            pass  # item not in cache, lets await it
+        else:
+            if refresh.due(entry) and call_key not in refreshing:
+                start(refreshing, call_key, args, kwargs)
+
+            return entry.value
+
+        try:
+            task = tasks[call_key]
+        except KeyError:
+            task = start(tasks, call_key, args, kwargs)
+
+        # Cancellation of one awaiter mustn't cancel others
+        return await asyncio.shield(task)
+
+    return wrapper
+
+
+def cache_many(
+    expire_in: Optional[Duration] = None,
+    **kwargs: Any,
+) -> Decorator:
+    """
+    Make results of batch function cachable between calls.
+
+    Decorated function takes list of keys, such as ids,
+    and returns list of values in the same order.
+    Only keys those are not cached are passed to it.
+    Other arguments are passed to `Cache`.
+    Decorated function has `cache_stats()`, `cache_reset_stats()`,
+    `cache_dump(path)` and `cache_load(path)`.
+    """
+
+    def decorator(function: Fany) -> Fany:
+        memo: Cache[Any, Any] = Cache(**kwargs)
+
+        @wraps(function)
+        def wrapper(keys: Iterable[Any]) -> List[Any]:
+            keys = list(keys)
+            found, missing = memo.get_many(keys)
+
+            if missing:
+                # Same key may be asked more than once
+                unique: Map[Any, None] = Map(copy_keys=False)
+                for key in missing:
+                    unique[key] = None
+
+                missing = list(unique)
+                values = list(function(missing))
+                if len(values) != len(missing):
+                    raise ValueError(
+                        f"{function.__name__} returned {len(values)} values"
+                        f" for {len(missing)} keys"
+                    )
+
+                loaded = list(zip(missing, values))
+                memo.save_many(loaded, expire_in=expire_in)
+                for key, value in loaded:
+                    found[key] = value
+
+            return [found[key] for key in keys]
+
+        return _expose_cache(wrapper, memo, None)
 
     return decorator
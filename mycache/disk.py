@@ -0,0 +1,298 @@
+"""
+Second cache tier, storing items evicted from memory in a local file.
+"""
+
+import mmap
+import os
+import pickle
+from collections import deque
+from typing import Any, Deque, Optional, Tuple, Type
+
+from mycache.nohashmap import Map
+
+
+_BYTES_LIKE = (bytes, bytearray, memoryview)
+
+
+class _Slot:
+    """
+    Location of stored value in segment file.
+    """
+
+    __slots__ = ("offset", "length", "raw", "value_type", "expire_at")
+
+    def __init__(
+        self,
+        offset: int,
+        length: int,
+        raw: bool,
+        value_type: Type[Any],
+        expire_at: Optional[float],
+    ) -> None:
+        self.offset = offset
+        self.length = length
+        self.raw = raw
+        self.value_type = value_type
+        self.expire_at = expire_at
+
+
+class DiskStore:
+    """
+    Append-only segment file at `path` with in-memory index of offsets.
+
+    The file is scratch space of a single process: it's truncated
+    when the store is opened and deleted when it's closed.
+    Values are pickled, except bytes-like ones, which are stored as is
+    and read back by `get` without copying as read-only `memoryview`
+    of memory-mapped file. `pop` and `get` with `copy` return a copy
+    of its original type.
+
+    When stored values exceed `max_bytes`, the oldest are dropped.
+    Space of dropped and replaced values is reclaimed by `compact`,
+    which runs by itself when the file has more garbage than
+    live values and at least `min_garbage` bytes of it.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: Optional[int] = None,
+        min_garbage: int = 1 << 20,
+    ) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.min_garbage = min_garbage
+        self._file = open(path, "w+b")
+        self._mmap: Optional[mmap.mmap] = None
+        self._end = 0
+        self._live = 0
+        self._dirty = False
+        # Keys are copied by `Cache`, so they are stored as is
+        self._index: Map[Any, _Slot] = Map(copy_keys=False)
+        # Oldest first, entries of dropped values are skipped lazily
+        self._order: Deque[Tuple[Any, _Slot]] = deque()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._index
+
+    def size_bytes(self) -> int:
+        """
+        Returns total size of stored values.
+        """
+
+        return self._live
+
+    def file_size(self) -> int:
+        """
+        Returns size of segment file, including garbage.
+        """
+
+        return self._end
+
+    def has(self, key: Any, now: Optional[float] = None) -> bool:
+        """
+        Checks if value for `key` is stored and not expired at `now`.
+        """
+
+        slot = self._index.get(key)
+        return slot is not None and not _expired(slot, now)
+
+    def save(
+        self,
+        key: Any,
+        value: Any,
+        expire_at: Optional[float] = None,
+    ) -> None:
+        """
+        Appends value to segment file.
+        Value larger than `max_bytes` or one which can't be pickled
+        is not saved at all.
+        """
+
+        self.discard(key)
+
+        raw = isinstance(value, _BYTES_LIKE)
+        payload = value
+        if not raw:
+            try:
+                payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            except (pickle.PicklingError, TypeError, AttributeError):
+                return
+
+        length = memoryview(payload).nbytes
+        if self.max_bytes is not None and length > self.max_bytes:
+            return
+
+        self._file.seek(self._end)
+        self._file.write(payload)
+        self._dirty = True
+
+        slot = _Slot(self._end, length, raw, type(value), expire_at)
+        self._index[key] = slot
+        self._order.append((key, slot))
+        self._end += length
+        self._live += length
+
+        self.__shrink()
+        if self._end - self._live > max(self._live, self.min_garbage):
+            self.compact()
+
+    def get(
+        self,
+        key: Any,
+        now: Optional[float] = None,
+        copy: bool = False,
+    ) -> Any:
+        """
+        Returns value for `key`
+        or raises `KeyError`, if it's not stored or expired at `now`.
+        With `copy` bytes-like value is copied to object
+        of its original type instead of returning a view.
+        """
+
+        return self.__read(key, now, copy)[0]
+
+    def pop(
+        self,
+        key: Any,
+        now: Optional[float] = None,
+    ) -> Tuple[Any, Optional[float]]:
+        """
+        Returns value for `key` and its expiration time and removes it,
+        raises `KeyError`, if it's not stored or expired at `now`.
+        Bytes-like value is copied to object of its original type.
+        """
+
+        value, slot = self.__read(key, now, True)
+        self.discard(key)
+        return value, slot.expire_at
+
+    def discard(self, key: Any) -> bool:
+        """
+        Removes value for `key`, if it's stored.
+        Returns `True`, if it was.
+        """
+
+        slot = self._index.pop(key, None)
+        if slot is None:
+            return False
+
+        self._live -= slot.length
+        return True
+
+    def compact(self) -> None:
+        """
+        Rewrites segment file with stored values only.
+        Memory views returned before stay valid.
+        """
+
+        compacted_path = self.path + ".compact"
+        order: Deque[Tuple[Any, _Slot]] = deque()
+        offset = 0
+
+        with open(compacted_path, "wb") as compacted:
+            for key, slot in self._order:
+                if self._index.get(key) is not slot:
+                    continue
+
+                compacted.write(self.__view(slot))
+                new_slot = _Slot(
+                    offset, slot.length, slot.raw, slot.value_type,
+                    slot.expire_at,
+                )
+                self._index[key] = new_slot
+                order.append((key, new_slot))
+                offset += slot.length
+
+        os.replace(compacted_path, self.path)
+        self._file.close()
+        self._file = open(self.path, "r+b")
+        # Old mapping is closed, when the last view of it is released
+        self._mmap = None
+        self._order = order
+        self._end = offset
+
+    def close(self) -> None:
+        """
+        Closes and deletes segment file.
+        """
+
+        self._index.clear()
+        self._order.clear()
+        self._mmap = None
+        self._file.close()
+
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __enter__(self) -> "DiskStore":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __read(
+        self,
+        key: Any,
+        now: Optional[float],
+        copy: bool = False,
+    ) -> Tuple[Any, _Slot]:
+        slot = self._index[key]
+        if _expired(slot, now):
+            self.discard(key)
+            raise KeyError(key)
+
+        view = self.__view(slot)
+        if slot.raw:
+            if copy:
+                return _materialize(view, slot.value_type), slot
+            return view, slot
+
+        return pickle.loads(view), slot
+
+    def __view(self, slot: _Slot) -> memoryview:
+        if slot.length == 0:
+            # Empty file can't be mapped
+            return memoryview(b"")
+
+        if self._dirty:
+            self._file.flush()
+            self._dirty = False
+
+        end = slot.offset + slot.length
+        if self._mmap is None or len(self._mmap) < end:
+            # Mapping is grown by replacing it, because views of
+            # the old one may still be used
+            self._mmap = mmap.mmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ,
+            )
+
+        return memoryview(self._mmap)[slot.offset:end]
+
+    def __shrink(self) -> None:
+        if self.max_bytes is None:
+            return
+
+        while self._live > self.max_bytes:
+            key, slot = self._order.popleft()
+            if self._index.get(key) is slot:
+                self.discard(key)
+
+
+def _materialize(view: memoryview, value_type: Type[Any]) -> Any:
+    if issubclass(value_type, memoryview):
+        # View of a copy, so it doesn't keep the file mapped
+        return memoryview(view.tobytes())
+
+    return value_type(view)
+
+
+def _expired(slot: _Slot, now: Optional[float]) -> bool:
+    return (
+        slot.expire_at is not None
+        and now is not None
+        and now >= slot.expire_at
+    )
@@ -3,9 +3,8 @@ Dict-like collection with no `Hashable` restriction on elements.
 """
 
 from copy import deepcopy
-from dataclasses import dataclass
 from typing import (
-    Any, Dict, Generic, Hashable, Iterator, List,
+    AbstractSet, Any, Dict, Generic, Hashable, Iterator, List,
     Mapping, MutableMapping, Tuple, TypeVar, Union
 )
 
@@ -14,19 +13,86 @@ Key = TypeVar("Key")
 Value = TypeVar("Value")
 
 
-@dataclass
+def unhashable(value: Any) -> bool:
+    """
+    Checks if `value` can't be used as `dict` key.
+    """
+
+    try:
+        hash(value)
+        return False
+    except TypeError:
+        return True
+
+
+_ATOMIC_TYPES = frozenset([bool, bytes, float, int, str, type(None)])
+# Default of `Map.pop`, which makes it raise `KeyError`
+_NO_DEFAULT: Any = object()
+
+
+def fingerprint(value: Any) -> Hashable:
+    """
+    Returns hashable fingerprint of `value`.
+
+    Dictionaries, sequences and sets are converted into
+    nested tuples and frozensets, so equal values always
+    have equal fingerprints. Different values may share
+    a fingerprint, so equality must be checked anyway.
+    """
+
+    value_type = type(value)
+
+    # Fast paths for the most common types
+    if value_type in _ATOMIC_TYPES:
+        return value
+    if value_type is dict:
+        return frozenset([
+            (key, fingerprint(item))
+            for key, item in value.items()
+        ])
+    if value_type is list or value_type is tuple:
+        return tuple([fingerprint(item) for item in value])
+    if value_type is set:
+        return frozenset(value)
+
+    if isinstance(value, Mapping):
+        return frozenset([
+            (key, fingerprint(item))
+            for key, item in value.items()
+        ])
+    if isinstance(value, (list, tuple)):
+        return tuple([fingerprint(item) for item in value])
+    if isinstance(value, AbstractSet):
+        return frozenset(value)
+    if isinstance(value, bytearray):
+        return bytes(value)
+
+    if not unhashable(value):
+        return value
+
+    # Nothing is known about structure of value,
+    # so all values of the same type share a fingerprint
+    return value_type  # type: ignore
+
+
 class KeyValue(Generic[Key, Value]):
     """
     Element of Map for unhashable keys.
     """
 
-    key: Key
-    value: Value
+    __slots__ = ("key", "value")
+
+    def __init__(self, key: Key, value: Value) -> None:
+        self.key = key
+        self.value = value
 
 
 class Map(MutableMapping[Key, Value]):
     """
     Dict-like collection with no `Hashable` restriction on elements.
+
+    Unhashable keys are grouped in buckets by their `fingerprint`,
+    so lookups take constant time on average.
     """
 
     from_collection: Dict[Key, Value]
@@ -41,7 +107,11 @@ class Map(MutableMapping[Key, Value]):
         copy_keys: bool = True,
     ) -> None:
         self.from_collection = dict(from_collection or [])
-        self._unhashable_items: List[KeyValue[Key, Value]] = list()
+        self._unhashable_items: Dict[
+            Hashable,
+            List[KeyValue[Key, Value]],
+        ] = dict()
+        self._unhashable_count = 0
         self._copy_keys = copy_keys
 
     def copy(self) -> "Map[Key, Value]":
@@ -51,68 +121,100 @@ class Map(MutableMapping[Key, Value]):
 
         clone = Map(self.from_collection)
 
-        for item in self._unhashable_items:
+        for item in self.__unhashable_items():
             clone[item.key] = item.value
 
         return clone
 
+    def pop(self, key: Key, default: Any = _NO_DEFAULT) -> Any:
+        """
+        Removes `key` and returns its value,
+        or returns `default`, if it's given and `key` is not stored.
+        """
+
+        if not unhashable(key):
+            if default is _NO_DEFAULT:
+                return self.from_collection.pop(key)
+            return self.from_collection.pop(key, default)
+
+        try:
+            # Missing keys are expected, if there is a default,
+            # so mutated keys aren't searched for
+            return self.__delitem_unhashable(
+                key, scan=default is _NO_DEFAULT,
+            )
+        except KeyError:
+            if default is _NO_DEFAULT:
+                raise
+            return default
+
     def __eq__(self, other: Any) -> bool:
-        return isinstance(other, Map) \
-            and self.from_collection == other.from_collection \
-            and self._unhashable_items == other._unhashable_items
+        if not isinstance(other, Map) \
+                or len(self) != len(other) \
+                or self.from_collection != other.from_collection:
+            return False
+
+        for item in self.__unhashable_items():
+            if item.key not in other or other[item.key] != item.value:
+                return False
+
+        return True
 
     def __len__(self) -> int:
-        return len(self.from_collection) + len(self._unhashable_items)
+        return len(self.from_collection) + self._unhashable_count
 
     def __getitem__(self, key: Key) -> Value:
-        if self.__unhashable(key):
-            return self.__getitem_unhashable(key)
-
-        return self.from_collection[key]
+        try:
+            return self.from_collection[key]
+        except TypeError:
+            return self.__find_unhashable(key).value
 
     def __contains__(self, key: Any) -> bool:
-        if self.__unhashable(key):
-            return self.__contains_unhashable(key)
+        try:
+            return key in self.from_collection
+        except TypeError:
+            pass
 
-        return key in self.from_collection
+        try:
+            self.__find_unhashable(key)
+            return True
+        except KeyError:
+            return False
 
     def __iter__(self) -> Iterator[Key]:
         for key in self.from_collection:
             yield key
 
-        for item in self._unhashable_items:
+        for item in self.__unhashable_items():
             yield item.key
 
     def __setitem__(self, key: Key, value: Value) -> None:
-        if self.__unhashable(key):
+        try:
+            self.from_collection[key] = value
+        except TypeError:
             self.__setitem_unhashable(key, value)
-            return
-
-        self.from_collection[key] = value
 
     def __delitem__(self, key: Key) -> None:
-        if self.__unhashable(key):
+        try:
+            del self.from_collection[key]
+        except TypeError:
             self.__delitem_unhashable(key)
-            return
 
-        del self.from_collection[key]
+    def __unhashable_items(self) -> Iterator[KeyValue[Key, Value]]:
+        for bucket in self._unhashable_items.values():
+            yield from bucket
 
-    def __getitem_unhashable(self, key: Key) -> Value:
-        for item in self._unhashable_items:
+    def __find_unhashable(self, key: Key) -> KeyValue[Key, Value]:
+        bucket = self._unhashable_items.get(fingerprint(key), ())
+        for item in bucket:
             if item.key == key:
-                return item.value
+                return item
 
         raise KeyError(key)
 
-    def __contains_unhashable(self, key: Key) -> bool:
-        for item in self._unhashable_items:
-            if item.key == key:
-                return True
-
-        return False
-
     def __setitem_unhashable(self, key: Key, value: Value) -> None:
-        for item in self._unhashable_items:
+        bucket = self._unhashable_items.setdefault(fingerprint(key), [])
+        for item in bucket:
             if item.key == key:
                 item.value = value
                 return
@@ -120,23 +222,36 @@ class Map(MutableMapping[Key, Value]):
         if self._copy_keys:
             key = deepcopy(key)
 
-        item = KeyValue(key, value)
-        self._unhashable_items.append(item)
+        bucket.append(KeyValue(key, value))
+        self._unhashable_count += 1
 
-    def __delitem_unhashable(self, key: Key) -> None:
-        for item in self._unhashable_items:
+    def __delitem_unhashable(self, key: Key, scan: bool = True) -> Value:
+        key_fingerprint = fingerprint(key)
+        bucket = self._unhashable_items.get(key_fingerprint, [])
+        for index, item in enumerate(bucket):
             if item.key == key:
-                return self._unhashable_items.remove(item)
+                return self.__delete(key_fingerprint, bucket, index)
+
+        if scan:
+            # Key mutated after it was stored stays in bucket
+            # of its old fingerprint, so it's found by identity
+            for key_fingerprint, bucket in self._unhashable_items.items():
+                for index, item in enumerate(bucket):
+                    if item.key is key:
+                        return self.__delete(key_fingerprint, bucket, index)
 
         raise KeyError(key)
 
-    @classmethod
-    def __unhashable(cls, value: Any) -> bool:
-        if not isinstance(value, Hashable):
-            return True
+    def __delete(
+        self,
+        key_fingerprint: Hashable,
+        bucket: List[KeyValue[Key, Value]],
+        index: int,
+    ) -> Value:
+        item = bucket.pop(index)
+        self._unhashable_count -= 1
 
-        try:
-            hash(value)
-            return False
-        except TypeError:
-            return True
+        if not bucket:
+            del self._unhashable_items[key_fingerprint]
+
+        return item.value
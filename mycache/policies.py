@@ -5,7 +5,11 @@ Set of different cache replacement policies.
 import random
 from abc import abstractmethod
 from dataclasses import dataclass, field
-from typing import Generic, List, TypeVar
+from itertools import chain
+from typing import Any, Generic, Iterable, Iterator, List, Optional, TypeVar
+
+from mycache.nohashmap import Map
+from mycache.sketch import CountMinSketch
 
 
 Key = TypeVar("Key")
@@ -43,51 +47,761 @@ class Policy(Generic[Key]):
         May be called even on items those are not in the `Cache`.
         """
 
+    def set_capacity(self, max_items: Optional[int]) -> None:
+        """
+        Method called by `Cache` with its `max_items`,
+        so policy can size its structures.
+        """
+
+    def admit(self, key: Key, victim: Key) -> bool:
+        """
+        Method called when `Cache` is full and new item with `key`
+        is about to replace `victim`, returned by `next_to_replace`.
+        If it returns `False`, new item isn't saved at all.
+        """
+
+        return True
+
+    def order(self) -> Optional[Iterable[Key]]:
+        """
+        Returns keys, the first to be replaced first,
+        so adding them in this order restores the policy approximately.
+        Returns `None` if order doesn't matter.
+        """
+
+        return None
+
+
+def _index() -> Map[Key, Any]:
+    # Policies store keys as they are given by `Cache`,
+    # so there is no need to copy them once again
+    return Map(copy_keys=False)
+
 
 @dataclass
 class Random(Policy[Key]):
     """
     Policy which will replace random items.
+
+    Keys are stored in a dense list without an index,
+    so each key takes just a pointer.
+    Key returned by `next_to_replace` is removed by swapping it
+    with the last one, other keys are only marked as removed
+    until they are chosen or the list is compacted,
+    so every operation takes amortized constant time.
     """
 
     _keys: List[Key] = field(default_factory=list)
+    _removed: Map[Key, None] = field(default_factory=_index)
+    _chosen: int = 0
 
     def next_to_replace(self) -> Key:
-        return random.choice(self._keys)
+        while True:
+            if not self._keys:
+                raise IndexError("no keys to replace")
+
+            slot = random.randrange(len(self._keys))
+            key = self._keys[slot]
+            if key not in self._removed:
+                self._chosen = slot
+                return key
+
+            del self._removed[key]
+            self.__discard(slot)
 
     def add(self, key: Key) -> None:
-        self._keys.append(key)
+        if key in self._removed:
+            # Removed key is still in the list
+            del self._removed[key]
+        else:
+            self._keys.append(key)
 
     def remove(self, key: Key) -> None:
-        self._keys.remove(key)
+        slot = self._chosen
+        if slot < len(self._keys) and self._keys[slot] is key:
+            self.__discard(slot)
+            return
+
+        self._removed[key] = None
+        if len(self._removed) > len(self._keys) // 2:
+            removed = self._removed
+            self._keys = [kept for kept in self._keys if kept not in removed]
+            self._removed = _index()
 
     def access(self, _key: Key) -> None:
         pass
 
+    def __discard(self, slot: int) -> None:
+        # Fill the hole with the last key
+        last = self._keys.pop()
+        if slot < len(self._keys):
+            self._keys[slot] = last
+
+
+class _Node(Generic[Key]):
+    """
+    Element of `_LinkedList`.
+    """
+
+    __slots__ = ("key", "prev", "next")
+
+    def __init__(self, key: Key) -> None:
+        self.key = key
+        self.prev: "_Node[Key]" = self
+        self.next: "_Node[Key]" = self
+
+
+class _LinkedList(Generic[Key]):
+    """
+    Circular doubly linked list with a sentinel node.
+    Every operation is O(1).
+    """
+
+    __slots__ = ("_root", "_size")
+
+    def __init__(self) -> None:
+        self._root: _Node[Optional[Key]] = _Node(None)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[Key]:
+        for node in self.nodes():
+            yield node.key
+
+    def nodes(self) -> Iterator[_Node[Key]]:
+        """
+        Iterates over nodes from the oldest one.
+        """
+
+        node = self._root.next
+        while node is not self._root:
+            yield node  # type: ignore
+            node = node.next
+
+    def first(self) -> _Node[Key]:
+        """
+        Returns the oldest node or raises `IndexError` if list is empty.
+        """
+
+        if self._size == 0:
+            raise IndexError("list is empty")
+
+        return self._root.next  # type: ignore
+
+    def after(self, node: _Node[Key]) -> Optional[_Node[Key]]:
+        """
+        Returns node next to `node` or `None` if `node` is the last one.
+        """
+
+        if node.next is self._root:
+            return None
+
+        return node.next
+
+    def append(self, node: _Node[Key]) -> None:
+        """
+        Inserts `node` at the end of list.
+        """
+
+        self.insert_after(self._root.prev, node)  # type: ignore
+
+    def insert_after(
+        self,
+        anchor: Optional[_Node[Key]],
+        node: _Node[Key],
+    ) -> None:
+        """
+        Inserts `node` after `anchor` or first, if `anchor` is `None`.
+        """
+
+        if anchor is None:
+            anchor = self._root  # type: ignore
+
+        following = anchor.next  # type: ignore
+        node.prev, node.next = anchor, following  # type: ignore
+        anchor.next = following.prev = node  # type: ignore
+        self._size += 1
+
+    def unlink(self, node: _Node[Key]) -> None:
+        """
+        Removes `node` from list.
+        """
+
+        node.prev.next = node.next
+        node.next.prev = node.prev
+        node.prev = node.next = node
+        self._size -= 1
+
+    def move_to_end(self, node: _Node[Key]) -> None:
+        """
+        Moves `node` to the end of list.
+        """
+
+        self.unlink(node)
+        self.append(node)
+
 
 @dataclass
 class LRU(Policy[Key]):
     """
     "Least Recent Used" cache replacement policy.
     Element that was accessed last will be replaced.
+
+    Keys are kept in a linked list indexed by `Map`,
+    so every operation takes constant time.
     """
 
-    _keys: List[Key] = field(default_factory=list)
+    _nodes: Map[Key, _Node[Key]] = field(default_factory=_index)
+    _queue: _LinkedList[Key] = field(default_factory=_LinkedList)
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def __contains__(self, key: Key) -> bool:
+        return key in self._nodes
 
     def next_to_replace(self) -> Key:
         # Return oldest key
-        return self._keys[0]
+        return self._queue.first().key
 
     def add(self, key: Key) -> None:
-        self._keys.append(key)
+        node = _Node(key)
+        self._nodes[key] = node
+        self._queue.append(node)
 
     def remove(self, key: Key) -> None:
-        self._keys.remove(key)
+        node = self._nodes.pop(key)
+        self._queue.unlink(node)
 
     def access(self, key: Key) -> None:
-        if key not in self._keys:
+        try:
+            node = self._nodes[key]
+        except KeyError:
             return
 
         # Move key on top of queue
-        self.remove(key)
-        self.add(key)
+        self._queue.move_to_end(node)
+
+    def order(self) -> Iterable[Key]:
+        return iter(self._queue)
+
+
+class _Bucket(_Node[int]):
+    """
+    Group of `LFU` entries with the same access frequency,
+    frequency is stored as key.
+    """
+
+    __slots__ = ("entries",)
+
+    def __init__(self, frequency: int) -> None:
+        super().__init__(frequency)
+        self.entries: _LinkedList[Any] = _LinkedList()
+
+
+class _Entry(_Node[Key]):
+    """
+    Key tracked by `LFU`.
+    """
+
+    __slots__ = ("bucket",)
+
+    def __init__(self, key: Key, bucket: _Bucket) -> None:
+        super().__init__(key)
+        self.bucket = bucket
+
+
+@dataclass
+class LFU(Policy[Key]):
+    """
+    "Least Frequently Used" cache replacement policy.
+    Element that was accessed least times will be replaced,
+    the oldest one among elements with the same frequency.
+
+    Keys are grouped in buckets by frequency,
+    buckets are kept in a linked list ordered by frequency,
+    so every operation takes constant time.
+
+    With `aging_period` all frequencies are halved
+    after that many accesses, so formerly hot keys
+    can be replaced eventually.
+    """
+
+    aging_period: Optional[int] = None
+    _entries: Map[Key, _Entry[Key]] = field(default_factory=_index)
+    _buckets: _LinkedList[int] = field(default_factory=_LinkedList)
+    _accesses: int = 0
+
+    def next_to_replace(self) -> Key:
+        bucket: _Bucket = self._buckets.first()  # type: ignore
+        return bucket.entries.first().key  # type: ignore
+
+    def add(self, key: Key) -> None:
+        bucket = self.__bucket_after(None, 1)
+        entry = _Entry(key, bucket)
+        bucket.entries.append(entry)
+        self._entries[key] = entry
+
+    def remove(self, key: Key) -> None:
+        entry = self._entries.pop(key)
+        self.__unlink(entry)
+
+    def access(self, key: Key) -> None:
+        try:
+            entry = self._entries[key]
+        except KeyError:
+            return
+
+        bucket = entry.bucket
+        next_bucket = self.__bucket_after(bucket, bucket.key + 1)
+        self.__unlink(entry)
+        entry.bucket = next_bucket
+        next_bucket.entries.append(entry)
+
+        self._accesses += 1
+        if self._accesses == self.aging_period:
+            self._accesses = 0
+            self.__age()
+
+    def order(self) -> Iterable[Key]:
+        for bucket in self._buckets.nodes():
+            yield from bucket.entries  # type: ignore
+
+    def __bucket_after(
+        self,
+        anchor: Optional[_Bucket],
+        frequency: int,
+    ) -> _Bucket:
+        following: Optional[_Node[int]] = None
+        if anchor is not None:
+            following = self._buckets.after(anchor)
+        elif self._buckets:
+            following = self._buckets.first()
+
+        if following is not None and following.key == frequency:
+            return following  # type: ignore
+
+        bucket = _Bucket(frequency)
+        self._buckets.insert_after(anchor, bucket)
+        return bucket
+
+    def __unlink(self, entry: _Entry[Key]) -> None:
+        bucket = entry.bucket
+        bucket.entries.unlink(entry)
+
+        if not bucket.entries:
+            self._buckets.unlink(bucket)
+
+    def __age(self) -> None:
+        buckets: List[_Bucket] = list(self._buckets.nodes())  # type: ignore
+        self._buckets = _LinkedList()
+        previous: Optional[_Bucket] = None
+
+        for bucket in buckets:
+            frequency = max(1, bucket.key // 2)
+
+            if previous is None or previous.key != frequency:
+                bucket.key = frequency
+                bucket.prev = bucket.next = bucket
+                self._buckets.append(bucket)
+                previous = bucket
+                continue
+
+            # Halved frequencies are equal, buckets are merged
+            for entry in list(bucket.entries.nodes()):
+                bucket.entries.unlink(entry)
+                entry.bucket = previous  # type: ignore
+                previous.entries.append(entry)
+
+
+@dataclass
+class WTinyLFU(Policy[Key]):
+    """
+    Window TinyLFU cache replacement policy.
+
+    New keys enter small LRU admission window
+    of `window_ratio` of cache capacity.
+    When cache is full, the oldest key of the window competes
+    with the oldest key of the main LRU region and the one
+    used less often, according to `CountMinSketch`, is replaced.
+    So keys used once don't push frequently used keys out.
+
+    Without known capacity, or if window is empty,
+    new keys are admitted only if they were used more often
+    than the key they would replace.
+    """
+
+    window_ratio: float = 0.01
+    _window_size: int = 0
+    _window: LRU[Key] = field(default_factory=LRU)
+    _main: LRU[Key] = field(default_factory=LRU)
+    _sketch: CountMinSketch = field(
+        default_factory=lambda: CountMinSketch(1024),
+    )
+
+    def set_capacity(self, max_items: Optional[int]) -> None:
+        if max_items is None:
+            return
+
+        self._window_size = int(max_items * self.window_ratio)
+        self._sketch = CountMinSketch(max_items)
+
+    def next_to_replace(self) -> Key:
+        if not self._main:
+            return self._window.next_to_replace()
+
+        victim = self._main.next_to_replace()
+        if len(self._window) < self._window_size or not self._window:
+            return victim
+
+        candidate = self._window.next_to_replace()
+        if self._sketch.frequency(candidate) > self._sketch.frequency(victim):
+            # Candidate will move to main region instead of victim
+            return victim
+
+        return candidate
+
+    def admit(self, key: Key, victim: Key) -> bool:
+        if self._window_size > 0:
+            # New key always enters the window
+            return True
+
+        if self._sketch.frequency(key) >= self._sketch.frequency(victim):
+            return True
+
+        # Rejected key is counted, so it could be admitted next time
+        self._sketch.add(key)
+        return False
+
+    def add(self, key: Key) -> None:
+        self._sketch.add(key)
+
+        if self._window_size == 0:
+            self._main.add(key)
+            return
+
+        self._window.add(key)
+        if len(self._window) > self._window_size:
+            candidate = self._window.next_to_replace()
+            self._window.remove(candidate)
+            self._main.add(candidate)
+
+    def remove(self, key: Key) -> None:
+        if key in self._window:
+            self._window.remove(key)
+            return
+
+        try:
+            self._main.remove(key)
+        except KeyError:
+            # Key mutated after it was added is found by identity only
+            self._window.remove(key)
+
+    def access(self, key: Key) -> None:
+        self._sketch.add(key)
+        self._window.access(key)
+        self._main.access(key)
+
+    def order(self) -> Iterable[Key]:
+        # Added keys pass through the window to main region
+        return chain(self._main.order(), self._window.order())
+
+
+def _remove_oldest(lru: LRU[Key]) -> Key:
+    key = lru.next_to_replace()
+    lru.remove(key)
+    return key
+
+
+@dataclass
+class SLRU(Policy[Key]):
+    """
+    Segmented LRU cache replacement policy.
+
+    New keys enter probation segment and move to protected segment
+    when accessed again. When protected segment exceeds
+    `protected_ratio` of cache capacity, its oldest keys
+    go back to probation. Keys are replaced from probation first,
+    so a scan of keys used once doesn't replace keys used often.
+    """
+
+    protected_ratio: float = 0.8
+    _protected_size: Optional[int] = None
+    _probation: LRU[Key] = field(default_factory=LRU)
+    _protected: LRU[Key] = field(default_factory=LRU)
+
+    def set_capacity(self, max_items: Optional[int]) -> None:
+        if max_items is not None:
+            self._protected_size = int(max_items * self.protected_ratio)
+
+    def next_to_replace(self) -> Key:
+        if self._probation:
+            return self._probation.next_to_replace()
+
+        return self._protected.next_to_replace()
+
+    def add(self, key: Key) -> None:
+        self._probation.add(key)
+
+    def remove(self, key: Key) -> None:
+        if key in self._probation:
+            self._probation.remove(key)
+            return
+
+        try:
+            self._protected.remove(key)
+        except KeyError:
+            # Key mutated after it was added is found by identity only
+            self._probation.remove(key)
+
+    def access(self, key: Key) -> None:
+        if key not in self._probation:
+            self._protected.access(key)
+            return
+
+        self._probation.remove(key)
+        self._protected.add(key)
+
+        if self._protected_size is not None:
+            while len(self._protected) > self._protected_size:
+                self._probation.add(_remove_oldest(self._protected))
+
+    def order(self) -> Iterable[Key]:
+        return chain(self._probation.order(), self._protected.order())
+
+
+@dataclass
+class ARC(Policy[Key]):
+    """
+    "Adaptive Replacement Cache" policy.
+
+    Keys used once are kept in recent LRU list
+    and keys used more than once in frequent LRU list.
+    Keys replaced from each list are remembered in ghost lists,
+    those hold no values and at most capacity keys in total.
+    Saving a key found in a ghost list moves the target size
+    of recent list, so the policy adapts to the workload.
+
+    Without known capacity it acts as LRU with scan protection,
+    but doesn't adapt.
+    """
+
+    _capacity: Optional[int] = None
+    _recent_target: float = 0
+    _recent: LRU[Key] = field(default_factory=LRU)
+    _frequent: LRU[Key] = field(default_factory=LRU)
+    _recent_ghosts: LRU[Key] = field(default_factory=LRU)
+    _frequent_ghosts: LRU[Key] = field(default_factory=LRU)
+
+    def set_capacity(self, max_items: Optional[int]) -> None:
+        self._capacity = max_items
+
+    def next_to_replace(self) -> Key:
+        if self._recent and (
+            len(self._recent) > self._recent_target or not self._frequent
+        ):
+            return self._recent.next_to_replace()
+
+        return self._frequent.next_to_replace()
+
+    def add(self, key: Key) -> None:
+        recent_ghosts, frequent_ghosts = \
+            self._recent_ghosts, self._frequent_ghosts
+
+        if key in recent_ghosts:
+            # Recent list was too short for this key
+            delta = max(1, len(frequent_ghosts) / len(recent_ghosts))
+            self._recent_target = min(
+                self._capacity or 0,
+                self._recent_target + delta,
+            )
+            recent_ghosts.remove(key)
+            self._frequent.add(key)
+        elif key in frequent_ghosts:
+            # Frequent list was too short for this key
+            delta = max(1, len(recent_ghosts) / len(frequent_ghosts))
+            self._recent_target = max(0, self._recent_target - delta)
+            frequent_ghosts.remove(key)
+            self._frequent.add(key)
+        else:
+            self._recent.add(key)
+
+        self.__trim_ghosts()
+
+    def remove(self, key: Key) -> None:
+        ghosts = self._recent_ghosts
+        if key in self._recent:
+            self._recent.remove(key)
+        else:
+            try:
+                self._frequent.remove(key)
+                ghosts = self._frequent_ghosts
+            except KeyError:
+                # Key mutated after it was added is found by identity only
+                self._recent.remove(key)
+
+        if self._capacity:
+            ghosts.add(key)
+            self.__trim_ghosts()
+
+    def access(self, key: Key) -> None:
+        if key in self._recent:
+            self._recent.remove(key)
+            self._frequent.add(key)
+        else:
+            self._frequent.access(key)
+
+    def order(self) -> Iterable[Key]:
+        return chain(self._recent.order(), self._frequent.order())
+
+    def __trim_ghosts(self) -> None:
+        capacity = self._capacity or 0
+        recent_ghosts, frequent_ghosts = \
+            self._recent_ghosts, self._frequent_ghosts
+
+        while recent_ghosts \
+                and len(self._recent) + len(recent_ghosts) > capacity:
+            _remove_oldest(recent_ghosts)
+
+        while len(recent_ghosts) + len(frequent_ghosts) > capacity:
+            _remove_oldest(frequent_ghosts or recent_ghosts)
+
+
+_EMPTY: Any = object()
+
+
+@dataclass
+class CLOCK(Policy[Key]):
+    """
+    CLOCK (second chance) cache replacement policy.
+
+    Keys are stored in a ring of slots, preallocated for cache capacity,
+    with a `bytearray` of visited bits. Access only sets a bit.
+    To find a key to replace, a hand moves around the ring
+    clearing set bits until it finds a key not visited since.
+    """
+
+    _keys: List[Key] = field(default_factory=list)
+    _visited: bytearray = field(default_factory=bytearray)
+    _slots: Map[Key, int] = field(default_factory=_index)
+    _free_slots: List[int] = field(default_factory=list)
+    _hand: int = 0
+
+    def set_capacity(self, max_items: Optional[int]) -> None:
+        if max_items is None or self._slots:
+            return
+
+        self._keys = [_EMPTY] * max_items
+        self._visited = bytearray(max_items)
+        self._free_slots = list(reversed(range(max_items)))
+
+    def next_to_replace(self) -> Key:
+        if not self._slots:
+            raise IndexError("no keys to replace")
+
+        keys, visited = self._keys, self._visited
+        hand, size = self._hand, len(keys)
+
+        while keys[hand] is _EMPTY or visited[hand]:
+            visited[hand] = 0
+            hand = (hand + 1) % size
+
+        # New key will take this slot, hand mustn't point to it
+        self._hand = (hand + 1) % size
+        return keys[hand]
+
+    def add(self, key: Key) -> None:
+        if self._free_slots:
+            slot = self._free_slots.pop()
+            self._keys[slot] = key
+        else:
+            slot = len(self._keys)
+            self._keys.append(key)
+            self._visited.append(0)
+
+        self._slots[key] = slot
+
+    def remove(self, key: Key) -> None:
+        slot = self._slots.pop(key)
+        self._keys[slot] = _EMPTY
+        self._visited[slot] = 0
+        self._free_slots.append(slot)
+
+    def access(self, key: Key) -> None:
+        try:
+            self._visited[self._slots[key]] = 1
+        except KeyError:
+            pass
+
+    def order(self) -> Iterable[Key]:
+        hand = self._hand
+        for key in chain(self._keys[hand:], self._keys[:hand]):
+            if key is not _EMPTY:
+                yield key
+
+
+class _SieveNode(_Node[Key]):
+    """
+    Key tracked by `SIEVE`.
+    """
+
+    __slots__ = ("visited",)
+
+    def __init__(self, key: Key) -> None:
+        super().__init__(key)
+        self.visited = False
+
+
+@dataclass
+class SIEVE(Policy[Key]):
+    """
+    SIEVE cache replacement policy.
+
+    Keys are kept in insertion order, access only marks key as visited.
+    To find a key to replace, a hand moves from older keys to newer ones
+    unmarking visited keys until it finds one not visited since.
+    Unlike CLOCK, new keys don't take place of replaced ones,
+    so keys used once are replaced soon.
+    """
+
+    _nodes: Map[Key, _SieveNode[Key]] = field(default_factory=_index)
+    _queue: _LinkedList[Key] = field(default_factory=_LinkedList)
+    _hand: Optional[_SieveNode[Key]] = None
+
+    def next_to_replace(self) -> Key:
+        node = self._hand or self._queue.first()
+
+        while node.visited:  # type: ignore
+            node.visited = False  # type: ignore
+            node = self._queue.after(node) or self._queue.first()
+
+        self._hand = self._queue.after(node)  # type: ignore
+        return node.key
+
+    def add(self, key: Key) -> None:
+        node = _SieveNode(key)
+        self._nodes[key] = node
+        self._queue.append(node)
+
+    def remove(self, key: Key) -> None:
+        node = self._nodes.pop(key)
+        if self._hand is node:
+            self._hand = self._queue.after(node)  # type: ignore
+
+        self._queue.unlink(node)
+
+    def access(self, key: Key) -> None:
+        try:
+            self._nodes[key].visited = True
+        except KeyError:
+            pass
+
+    def order(self) -> Iterable[Key]:
+        nodes = list(self._queue.nodes())
+        hand = 0
+        if self._hand is not None:
+            hand = nodes.index(self._hand)
+
+        return [node.key for node in chain(nodes[hand:], nodes[:hand])]
@@ -0,0 +1,211 @@
+"""
+Recording of cache accesses for offline replay.
+"""
+
+import struct
+import threading
+import time
+from enum import IntEnum
+from typing import Any, BinaryIO, Iterator, NamedTuple
+
+from mycache.sketch import key_hash
+
+
+_MAGIC = b"MCTRACE1"
+_RECORD = struct.Struct("<dQBB")
+_MASK = 2 ** 64 - 1
+_MIX = 0x9E3779B97F4A7C15
+
+
+class Operation(IntEnum):
+    """
+    Recorded cache operation.
+    """
+
+    GET = 0
+    HAS = 1
+    SAVE = 2
+    REMOVE = 3
+
+
+class TraceEvent(NamedTuple):
+    """
+    Single recorded cache operation.
+
+    `key` is 64-bit hash of the key. Hashes of strings and bytes
+    differ between processes, unless `PYTHONHASHSEED` is set,
+    but are consistent within one recording.
+    `hit` tells if key was cached.
+    """
+
+    operation: Operation
+    key: int
+    timestamp: float
+    hit: bool
+
+
+def trace_key(key: Any) -> int:
+    """
+    Returns 64-bit hash of `key`, as it's recorded.
+    """
+
+    return key_hash(key) & _MASK
+
+
+class TraceRecorder:
+    """
+    Records cache operations into binary file at `path`.
+
+    Events are packed into ring buffer of `capacity` events,
+    which is written to file by background thread
+    every `flush_interval` seconds or when it's half full.
+    If writing falls behind, the oldest events are dropped.
+
+    Only `sample_rate` of keys is recorded, but every operation
+    on a sampled key is, so replay sees its whole history.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        capacity: int = 65536,
+        sample_rate: float = 1.0,
+        flush_interval: float = 1.0,
+    ) -> None:
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        if not 0 < sample_rate <= 1:
+            raise ValueError("sample_rate must be in (0, 1]")
+
+        self._capacity = capacity
+        self._buffer = bytearray(capacity * _RECORD.size)
+        self._threshold = int(sample_rate * _MASK)
+        self._recorded = 0
+        self._flushed = 0
+        self._dropped = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+        self._file: BinaryIO = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(_MAGIC)
+
+        self._flush_interval = flush_interval
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def record(self, operation: Operation, key: Any, hit: bool) -> None:
+        """
+        Adds event to buffer, if `key` is sampled.
+        """
+
+        key_id = trace_key(key)
+        if (key_id * _MIX) & _MASK > self._threshold or self._closed:
+            return
+
+        size = _RECORD.size
+        with self._lock:
+            pending = self._recorded - self._flushed
+            if pending >= self._capacity:
+                self._flushed += 1
+                self._dropped += 1
+
+            offset = (self._recorded % self._capacity) * size
+            _RECORD.pack_into(
+                self._buffer, offset, time.time(), key_id, operation, hit,
+            )
+            self._recorded += 1
+
+        if pending + 1 == self._capacity // 2:
+            self._wakeup.set()
+
+    def dropped(self) -> int:
+        """
+        Returns count of events overwritten before they were written.
+        """
+
+        return self._dropped
+
+    def flush(self) -> None:
+        """
+        Writes buffered events to file.
+        """
+
+        with self._write_lock:
+            with self._lock:
+                chunk = self._take()
+
+            if chunk and not self._file.closed:
+                self._file.write(chunk)
+                self._file.flush()
+
+    def close(self) -> None:
+        """
+        Stops background thread, writes remaining events and closes file.
+        """
+
+        if self._closed:
+            return
+
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join()
+        self.flush()
+        self._file.close()
+
+    def __enter__(self) -> "TraceRecorder":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _take(self) -> bytes:
+        size = _RECORD.size
+        start = (self._flushed % self._capacity) * size
+        end = (self._recorded % self._capacity) * size
+        pending = self._recorded - self._flushed
+        self._flushed = self._recorded
+
+        if pending == 0:
+            return b""
+        if start < end:
+            return bytes(self._buffer[start:end])
+
+        return bytes(self._buffer[start:] + self._buffer[:end])
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wakeup.wait(self._flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+def read_events(path: str, chunk_size: int = 4096) -> Iterator[TraceEvent]:
+    """
+    Yields events recorded into file at `path`.
+    Incomplete last event, left by interrupted write, is skipped.
+    """
+
+    size = _RECORD.size
+
+    with open(path, "rb") as trace:
+        if trace.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError(f"{path} is not a cache trace")
+
+        tail = b""
+        while True:
+            data = trace.read(chunk_size * size)
+            if not data:
+                break
+
+            data = tail + data
+            whole = len(data) - len(data) % size
+            tail = data[whole:]
+
+            records = _RECORD.iter_unpack(memoryview(data)[:whole])
+            for timestamp, key, operation, hit in records:
+                yield TraceEvent(
+                    Operation(operation), key, timestamp, bool(hit),
+                )
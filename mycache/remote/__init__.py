@@ -0,0 +1,9 @@
+"""
+Cache served over TCP, so processes on many hosts share items.
+"""
+
+from mycache.remote.client import RemoteCache
+from mycache.remote.server import CacheServer
+
+
+__all__ = ["CacheServer", "RemoteCache"]
@@ -0,0 +1,367 @@
+"""
+Client of cache servers, spreading keys between them.
+"""
+
+import pickle
+import queue
+import socket
+from bisect import bisect
+from hashlib import blake2b
+from itertools import count
+from typing import (
+    Any, BinaryIO, Dict, Iterable, List, Mapping, Optional, Sequence,
+    Tuple, Union
+)
+
+from mycache.clock import Duration, seconds
+from mycache.nohashmap import Map
+from mycache.remote.protocol import (
+    NO_EXPIRATION, OP_GET, OP_HAS, OP_REMOVE, OP_SAVE, OP_SIZE, REQUEST,
+    RESPONSE, SIZE, STATUS_ERROR, STATUS_MISSING
+)
+from mycache.stats import CacheStats
+
+
+_KEY_PROTOCOL = 4
+
+Request = Tuple[int, bytes, bytes, float]
+Response = Tuple[int, bytes]
+
+
+def _hash(data: bytes) -> int:
+    return int.from_bytes(blake2b(data, digest_size=8).digest(), "little")
+
+
+class _Connection:
+    """
+    Socket to server with buffered reader.
+    """
+
+    def __init__(self, address: Tuple[str, int], timeout: float) -> None:
+        self.socket = socket.create_connection(address, timeout)
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader: BinaryIO = self.socket.makefile("rb")  # type: ignore
+
+    def read(self, size: int) -> bytes:
+        data = self.reader.read(size)
+        if len(data) != size:
+            raise ConnectionError("connection closed by server")
+
+        return data
+
+    def close(self) -> None:
+        self.reader.close()
+        self.socket.close()
+
+
+class _Server:
+    """
+    Address of server and pool of idle connections to it.
+    """
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        pool_size: int,
+        timeout: float,
+    ) -> None:
+        self.address = address
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[_Connection]" = \
+            queue.LifoQueue(pool_size)
+        self._request_ids = count()
+
+    def call(self, requests: Sequence[Request]) -> List[Response]:
+        """
+        Sends all `requests` at once and reads their responses.
+        """
+
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            connection = _Connection(self.address, self.timeout)
+
+        try:
+            responses = self.__call(connection, requests)
+        except BaseException:
+            # Responses of unfinished requests may still come
+            connection.close()
+            raise
+
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+        return responses
+
+    def close(self) -> None:
+        """
+        Closes idle connections.
+        """
+
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def __call(
+        self,
+        connection: _Connection,
+        requests: Sequence[Request],
+    ) -> List[Response]:
+        first_id = next(self._request_ids) & 0xFFFFFFFF
+        frames = []
+        for index, (operation, key, value, expire_in) in enumerate(requests):
+            request_id = (first_id + index) & 0xFFFFFFFF
+            frames.append(REQUEST.pack(
+                request_id, operation, expire_in, len(key), len(value),
+            ))
+            frames.append(key)
+            frames.append(value)
+
+        connection.socket.sendall(b"".join(frames))
+
+        responses = []
+        for index in range(len(requests)):
+            request_id, status, length = \
+                RESPONSE.unpack(connection.read(RESPONSE.size))
+            if request_id != (first_id + index) & 0xFFFFFFFF:
+                raise ConnectionError("response to unexpected request")
+            if status == STATUS_ERROR:
+                raise ConnectionError("server rejected request")
+
+            responses.append((status, connection.read(length)))
+
+        return responses
+
+
+class RemoteCache:
+    """
+    Cache stored by `CacheServer` processes at `servers` addresses,
+    such as `"127.0.0.1:7379"`.
+
+    Keys are spread between servers by consistent hashing
+    with `replicas` points per server on the ring,
+    so adding a server moves only a share of keys.
+    Every server has a pool of up to `pool_size` idle connections.
+    Bulk methods send all requests to a server at once
+    and wait for one round-trip.
+
+    Keys and values are pickled, values returned by servers
+    are unpickled, so servers must be trusted.
+    """
+
+    def __init__(
+        self,
+        servers: Sequence[str],
+        pool_size: int = 4,
+        timeout: float = 5.0,
+        replicas: int = 100,
+    ) -> None:
+        if not servers:
+            raise ValueError("at least one server is required")
+
+        self._servers: List[_Server] = []
+        ring: List[Tuple[int, int]] = []
+
+        for index, server in enumerate(servers):
+            host, port = server.rsplit(":", 1)
+            address = (host, int(port))
+            self._servers.append(_Server(address, pool_size, timeout))
+            for replica in range(replicas):
+                ring.append((_hash(f"{server}#{replica}".encode()), index))
+
+        ring.sort()
+        self._points = [point for point, _ in ring]
+        self._owners = [index for _, index in ring]
+        self._hits = self._misses = self._inserts = 0
+
+    def server_of(self, key: Any) -> str:
+        """
+        Returns address of server storing `key`.
+        """
+
+        host, port = self._servers[self.__owner(self.__key(key))].address
+        return f"{host}:{port}"
+
+    def has(self, key: Any) -> bool:
+        """
+        Checks if item with `key` is cached and not expired.
+        """
+
+        return self.__call_one(OP_HAS, key)[0] != STATUS_MISSING
+
+    def get(self, key: Any) -> Any:
+        """
+        Returns cached item for `key`
+        or raises `KeyError` if item is expired.
+        """
+
+        status, value = self.__call_one(OP_GET, key)
+        if status == STATUS_MISSING:
+            self._misses += 1
+            raise KeyError(key)
+
+        self._hits += 1
+        return pickle.loads(value)
+
+    def save(
+        self,
+        key: Any,
+        value: Any,
+        expire_in: Optional[Duration] = None,
+    ) -> None:
+        """
+        Adds item to cache.
+        `expire_in` is `timedelta` or number of seconds.
+        """
+
+        self.save_many([(key, value)], expire_in)
+
+    def remove(self, key: Any) -> None:
+        """
+        Removes item with `key` from the cache.
+        Raises `KeyError` if there are no such item.
+        """
+
+        if self.__call_one(OP_REMOVE, key)[0] == STATUS_MISSING:
+            raise KeyError(key)
+
+    def get_many(
+        self,
+        keys: Iterable[Any],
+    ) -> Tuple[Map[Any, Any], List[Any]]:
+        """
+        Returns cached items for `keys` and list of keys
+        those are not cached or expired.
+        """
+
+        keys = list(keys)
+        requests = [
+            (OP_GET, self.__key(key), b"", NO_EXPIRATION) for key in keys
+        ]
+        found: Map[Any, Any] = Map(copy_keys=False)
+        missing: List[Any] = []
+
+        for key, (status, value) in zip(keys, self.__call_many(requests)):
+            if status == STATUS_MISSING:
+                missing.append(key)
+            else:
+                found[key] = pickle.loads(value)
+
+        self._hits += len(found)
+        self._misses += len(missing)
+        return found, missing
+
+    def save_many(
+        self,
+        items: Union[Mapping[Any, Any], Iterable[Tuple[Any, Any]]],
+        expire_in: Optional[Duration] = None,
+    ) -> None:
+        """
+        Adds items to cache.
+        """
+
+        pairs = items.items() if isinstance(items, Mapping) else items
+        ttl = NO_EXPIRATION
+        if expire_in is not None:
+            ttl = seconds(expire_in)  # type: ignore
+
+        requests: List[Request] = [
+            (
+                OP_SAVE,
+                self.__key(key),
+                pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                ttl,
+            )
+            for key, value in pairs
+        ]
+
+        self.__call_many(requests)
+        self._inserts += len(requests)
+
+    def remove_many(self, keys: Iterable[Any]) -> None:
+        """
+        Removes items with `keys` from the cache.
+        Keys those are not cached are ignored.
+        """
+
+        self.__call_many([
+            (OP_REMOVE, self.__key(key), b"", NO_EXPIRATION) for key in keys
+        ])
+
+    def size(self) -> int:
+        """
+        Returns count of items on all servers.
+        """
+
+        request = (OP_SIZE, b"", b"", NO_EXPIRATION)
+        return sum(
+            SIZE.unpack(server.call([request])[0][1])[0]
+            for server in self._servers
+        )
+
+    def stats(self) -> CacheStats:
+        """
+        Returns snapshot of counters of this client.
+        Evictions and expirations happen on servers and aren't counted.
+        """
+
+        return CacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            inserts=self._inserts,
+            evictions=0,
+            expirations=0,
+            size=self.size(),
+        )
+
+    def reset_stats(self) -> None:
+        """
+        Sets counters of this client to zero.
+        """
+
+        self._hits = self._misses = self._inserts = 0
+
+    def close(self) -> None:
+        """
+        Closes idle connections.
+        """
+
+        for server in self._servers:
+            server.close()
+
+    def __enter__(self) -> "RemoteCache":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __key(self, key: Any) -> bytes:
+        return pickle.dumps(key, _KEY_PROTOCOL)
+
+    def __owner(self, key: bytes) -> int:
+        point = bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[point]
+
+    def __call_one(self, operation: int, key: Any) -> Response:
+        data = self.__key(key)
+        request = (operation, data, b"", NO_EXPIRATION)
+        return self._servers[self.__owner(data)].call([request])[0]
+
+    def __call_many(self, requests: List[Request]) -> List[Response]:
+        # Indexes of requests grouped by server
+        batches: Dict[int, List[int]] = {}
+        for index, request in enumerate(requests):
+            batches.setdefault(self.__owner(request[1]), []).append(index)
+
+        responses: List[Response] = [(0, b"")] * len(requests)
+        for owner, indexes in batches.items():
+            batch = [requests[index] for index in indexes]
+            for index, response in zip(
+                    indexes, self._servers[owner].call(batch)):
+                responses[index] = response
+
+        return responses
@@ -0,0 +1,24 @@
+"""
+Binary protocol of cache server.
+
+Every request is a frame of request id, operation, seconds to expire
+(negative for none), lengths of key and value, followed by key and value.
+Every response is a frame of request id, status and length of value,
+followed by value. Keys and values are opaque bytes to the server.
+Responses come in order of requests, so client may send many requests
+before reading responses.
+"""
+
+import struct
+
+
+REQUEST = struct.Struct("<IBdII")
+RESPONSE = struct.Struct("<IBI")
+SIZE = struct.Struct("<Q")
+
+MAX_FRAME = 64 * 1024 * 1024
+
+OP_HAS, OP_GET, OP_SAVE, OP_REMOVE, OP_SIZE = range(5)
+STATUS_OK, STATUS_MISSING, STATUS_ERROR = range(3)
+
+NO_EXPIRATION = -1.0
@@ -0,0 +1,180 @@
+"""
+Asyncio TCP server wrapping `Cache` of bytes.
+"""
+
+import argparse
+import asyncio
+from typing import Any, List, Optional, Tuple
+
+from mycache.cache import Cache
+from mycache.remote.protocol import (
+    MAX_FRAME, NO_EXPIRATION, OP_GET, OP_HAS, OP_REMOVE, OP_SAVE, OP_SIZE,
+    REQUEST, RESPONSE, SIZE, STATUS_ERROR, STATUS_MISSING, STATUS_OK
+)
+
+
+class CacheServer:
+    """
+    Serves `cache` to clients connected to `host` and `port`.
+
+    Server stores keys and values as bytes and never deserializes them,
+    so clients can't make it run any code.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[Cache[bytes, bytes]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        if cache is None:
+            cache = Cache(copy_keys=False)
+
+        self.cache = cache
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> Tuple[str, int]:
+        """
+        Starts listening and returns address of server,
+        with port chosen by system, if `port` is zero.
+        """
+
+        self._server = await asyncio.start_server(
+            self._handle, self.host, self.port,
+        )
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return host, port
+
+    async def serve_forever(self) -> None:
+        """
+        Serves clients until cancelled.
+        """
+
+        if self._server is None:
+            await self.start()
+
+        await self._server.serve_forever()  # type: ignore
+
+    async def close(self) -> None:
+        """
+        Stops listening.
+        """
+
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        try:
+            while True:
+                header = await reader.readexactly(REQUEST.size)
+                request_id, operation, expire_in, key_length, value_length = \
+                    REQUEST.unpack(header)
+                if key_length + value_length > MAX_FRAME:
+                    break
+
+                body = await reader.readexactly(key_length + value_length)
+                status, value = self.execute(
+                    operation, body[:key_length], body[key_length:], expire_in,
+                )
+                writer.write(RESPONSE.pack(request_id, status, len(value)))
+                writer.write(value)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def execute(
+        self,
+        operation: int,
+        key: bytes,
+        value: bytes,
+        expire_in: float,
+    ) -> Tuple[int, bytes]:
+        """
+        Runs single operation and returns status and value of response.
+        """
+
+        cache = self.cache
+
+        if operation == OP_GET:
+            try:
+                return STATUS_OK, cache.get(key)
+            except KeyError:
+                return STATUS_MISSING, b""
+
+        if operation == OP_HAS:
+            return (STATUS_OK if cache.has(key) else STATUS_MISSING), b""
+
+        if operation == OP_SAVE:
+            cache.save(
+                key, value, None if expire_in == NO_EXPIRATION else expire_in,
+            )
+            return STATUS_OK, b""
+
+        if operation == OP_REMOVE:
+            try:
+                cache.remove(key)
+            except KeyError:
+                return STATUS_MISSING, b""
+            return STATUS_OK, b""
+
+        if operation == OP_SIZE:
+            return STATUS_OK, SIZE.pack(cache.size())
+
+        return STATUS_ERROR, b""
+
+
+def _weigh(key: bytes, value: bytes) -> float:
+    return len(key) + len(value)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Runs cache server until interrupted.
+    """
+
+    parser = argparse.ArgumentParser(
+        prog="mycache-server",
+        description="Serves cache over TCP.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument(
+        "--port", type=int, default=7379,
+        help="port to listen, 0 to choose any free one (default: 7379)",
+    )
+    parser.add_argument("--max-items", type=int, default=None)
+    parser.add_argument(
+        "--max-bytes", type=int, default=None,
+        help="limit of total size of keys and values",
+    )
+    args = parser.parse_args(argv)
+
+    cache: Cache[Any, Any] = Cache(
+        copy_keys=False,
+        max_items=args.max_items,
+        max_weight=args.max_bytes,
+        weigher=_weigh,
+    )
+    server = CacheServer(cache, args.host, args.port)
+
+    async def serve() -> None:
+        host, port = await server.start()
+        print(f"listening on {host}:{port}", flush=True)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
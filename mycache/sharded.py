@@ -0,0 +1,155 @@
+"""
+Thread-safe cache splitting keys between independently locked shards.
+"""
+
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Generic, List, Optional, TypeVar
+
+from mycache.cache import Cache
+from mycache.clock import Clock, Duration
+from mycache.nohashmap import fingerprint
+from mycache.policies import Policy, Random as RandomPolicy
+from mycache.stats import CacheStats
+
+
+Key = TypeVar("Key")
+Value = TypeVar("Value")
+
+
+def shard_of(key: object, shards: int) -> int:
+    """
+    Returns index of shard for `key`.
+    """
+
+    try:
+        return hash(key) % shards
+    except TypeError:
+        return hash(fingerprint(key)) % shards
+
+
+@dataclass
+class ShardedCache(Generic[Key, Value]):
+    """
+    Thread-safe version of `Cache`.
+
+    Keys are split between `shards` caches, each with its own lock,
+    `Map` and replacement policy made by `policy_factory`,
+    so operations on keys from different shards don't contend.
+    `max_items` is divided between shards as equally as possible,
+    cache with fewer `max_items` than `shards` has a shard per item.
+    """
+
+    shards: int = 16
+    copy_keys: bool = True
+    max_items: Optional[int] = None
+    policy_factory: Callable[[], Policy[Key]] = RandomPolicy
+    clock: Optional[Clock] = None
+    _caches: List[Cache[Key, Value]] = field(init=False)
+    _locks: List[threading.Lock] = field(init=False)
+
+    def __post_init__(self) -> None:
+        if self.shards < 1:
+            raise ValueError("there must be at least one shard")
+
+        shard_max_items: List[Optional[int]] = [None] * self.shards
+        if self.max_items is not None:
+            # Every shard must be able to store something
+            self.shards = max(1, min(self.shards, self.max_items))
+            share, rest = divmod(self.max_items, self.shards)
+            shard_max_items = [
+                share + (shard < rest) for shard in range(self.shards)
+            ]
+
+        self._caches = [
+            Cache(
+                copy_keys=self.copy_keys,
+                max_items=max_items,
+                replacement_policy=self.policy_factory(),
+                clock=self.clock,
+            )
+            for max_items in shard_max_items
+        ]
+        self._locks = [threading.Lock() for _ in range(self.shards)]
+
+    def has(self, key: Key) -> bool:
+        """
+        Checks if item with `key` is cached and not expired.
+        """
+
+        shard = shard_of(key, self.shards)
+        with self._locks[shard]:
+            return self._caches[shard].has(key)
+
+    def get(self, key: Key) -> Value:
+        """
+        Returns cached item for `key`
+        or raises `KeyError` if item is expired.
+        """
+
+        shard = shard_of(key, self.shards)
+        with self._locks[shard]:
+            return self._caches[shard].get(key)
+
+    def peek(self, key: Key, default: Any = None) -> Any:
+        """
+        Returns cached item for `key` or `default`,
+        without counting lookup and updating replacement policy.
+        """
+
+        shard = shard_of(key, self.shards)
+        with self._locks[shard]:
+            return self._caches[shard].peek(key, default)
+
+    def size(self) -> int:
+        """
+        Returns count of items in cache.
+        """
+
+        return sum(cache.size() for cache in self._caches)
+
+    def stats(self) -> CacheStats:
+        """
+        Returns snapshot of counters summed over all shards.
+        """
+
+        shard_stats = []
+        for lock, cache in zip(self._locks, self._caches):
+            with lock:
+                shard_stats.append(cache.stats())
+
+        return CacheStats(*map(sum, zip(*shard_stats)))
+
+    def reset_stats(self) -> None:
+        """
+        Sets counters of all shards to zero.
+        """
+
+        for lock, cache in zip(self._locks, self._caches):
+            with lock:
+                cache.reset_stats()
+
+    def save(
+        self,
+        key: Key,
+        value: Value,
+        expire_in: Optional[Duration] = None,
+    ) -> None:
+        """
+        Adds item to cache.
+        Replaces item of the same shard if shard is full.
+        """
+
+        shard = shard_of(key, self.shards)
+        with self._locks[shard]:
+            self._caches[shard].save(key, value, expire_in=expire_in)
+
+    def remove(self, key: Key) -> None:
+        """
+        Removes item with `key` from the cache.
+        Raises `KeyError` if there are no such item.
+        """
+
+        shard = shard_of(key, self.shards)
+        with self._locks[shard]:
+            self._caches[shard].remove(key)
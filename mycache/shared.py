@@ -0,0 +1,402 @@
+"""
+Cache living in shared memory, so processes on a host share items.
+"""
+
+import multiprocessing
+import pickle
+import struct
+import time
+from hashlib import blake2b
+from multiprocessing import shared_memory
+from time import monotonic
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from mycache.clock import Clock, Duration, seconds
+from mycache.stats import CacheStats
+
+
+_MAGIC = b"MYCACHE1"
+# Magic, count of slots, size of slot, count of items
+_HEADER = struct.Struct("<8sIIQ")
+_HEADER_SIZE = 64
+_COUNT_OFFSET = 16
+
+# Sequence, state, key hash, key length, value length,
+# expiration time and last access time
+_SLOT = struct.Struct("<IBxxxQIIdd")
+_SEQUENCE = struct.Struct("<I")
+_ACCESS = struct.Struct("<d")
+_ACCESS_OFFSET = 32
+_COUNT = struct.Struct("<Q")
+
+_EMPTY, _USED, _REMOVED = 0, 1, 2
+# Slot still unstable after so many reads is taken for a miss,
+# its writer could die in the middle of a write
+_READ_ATTEMPTS = 1000
+_KEY_PROTOCOL = 4
+_NEVER = float("inf")
+
+
+def _key_hash(key: bytes) -> int:
+    # Built-in hash of strings differs between processes
+    return int.from_bytes(blake2b(key, digest_size=8).digest(), "little")
+
+
+def _attach(name: Optional[str]) -> shared_memory.SharedMemory:
+    try:
+        # Segment is owned by its creator, it mustn't be unlinked
+        # when this process exits
+        return shared_memory.SharedMemory(  # type: ignore
+            name, track=False,
+        )
+    except TypeError:
+        # Before Python 3.13 segments are always tracked, so processes
+        # attaching to it must share resource tracker with its creator,
+        # as forked and spawned children do
+        return shared_memory.SharedMemory(name)
+
+
+class SharedCache:
+    """
+    Cache stored in `multiprocessing.shared_memory` segment `name`.
+
+    Segment is a fixed hash table of `slots` slots of `slot_size` bytes
+    with open addressing. Keys and values are pickled,
+    items larger than a slot are not saved at all.
+    Key is looked up in at most `max_probe` neighbouring slots,
+    if they are all taken, the least recently used one is replaced.
+
+    Writers are serialized by `lock`, which has to be shared
+    by all processes, such as `multiprocessing.Lock` created
+    before workers are forked. A writer, which dies holding the lock,
+    blocks all other writers, the segment has to be recreated then.
+    Readers take no lock: every slot has a sequence number,
+    which is odd while slot is written, and reads are retried
+    if it changed. Slot, which doesn't get stable in time,
+    such as one left by a killed writer, is read as a miss
+    until it's written again.
+
+    Processes attach to existing segment with `create=False`
+    or by unpickling the cache. Expiration is measured by `clock`,
+    monotonic clock by default, it has to be the same in all processes.
+    Keys have to pickle to the same bytes in every process.
+    """
+
+    def __init__(
+        self,
+        name: Optional[str] = None,
+        slots: int = 4096,
+        slot_size: int = 256,
+        create: bool = True,
+        lock: Any = None,
+        max_probe: int = 8,
+        clock: Optional[Clock] = None,
+    ) -> None:
+        if create:
+            if slot_size <= _SLOT.size:
+                raise ValueError(f"slot_size must exceed {_SLOT.size}")
+
+            self._memory = shared_memory.SharedMemory(
+                name, create=True, size=_HEADER_SIZE + slots * slot_size,
+            )
+            self._buffer: memoryview = self._memory.buf  # type: ignore
+            _HEADER.pack_into(self._buffer, 0, _MAGIC, slots, slot_size, 0)
+        else:
+            self._memory = _attach(name)
+            self._buffer = self._memory.buf  # type: ignore
+            magic, slots, slot_size, _ = _HEADER.unpack_from(self._buffer)
+            if magic != _MAGIC:
+                raise ValueError(f"{name} is not a cache segment")
+
+        self.name = self._memory.name
+        self.slots = slots
+        self.slot_size = slot_size
+        self.max_probe = min(max_probe, slots)
+        self.clock = clock
+        self.lock = multiprocessing.Lock() if lock is None else lock
+        self._owner = create
+        self._hits = self._misses = self._inserts = 0
+        self._evictions = self._expired_items = 0
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "lock": self.lock,
+            "max_probe": self.max_probe,
+            "clock": self.clock,
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(create=False, **state)  # type: ignore
+
+    def __enter__(self) -> "SharedCache":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def has(self, key: Any) -> bool:
+        """
+        Checks if item with `key` is cached and not expired.
+        """
+
+        return self.__lookup(pickle.dumps(key, _KEY_PROTOCOL)) is not None
+
+    def get(self, key: Any) -> Any:
+        """
+        Returns cached item for `key`
+        or raises `KeyError` if item is expired.
+        """
+
+        found = self.__lookup(pickle.dumps(key, _KEY_PROTOCOL))
+        if found is None:
+            self._misses += 1
+            raise KeyError(key)
+
+        self._hits += 1
+        return pickle.loads(found)
+
+    def save(
+        self,
+        key: Any,
+        value: Any,
+        expire_in: Optional[Duration] = None,
+    ) -> None:
+        """
+        Adds item to cache.
+        Item which doesn't fit in a slot is not saved,
+        but old value for `key` is removed.
+        `expire_in` is `timedelta` or number of seconds.
+        """
+
+        key_data = pickle.dumps(key, _KEY_PROTOCOL)
+        value_data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        expire_at = _NEVER
+        if expire_in is not None:
+            expire_at = self.__now() + seconds(expire_in)  # type: ignore
+
+        if _SLOT.size + len(key_data) + len(value_data) > self.slot_size:
+            self.__remove(key_data)
+            return
+
+        key_hash = _key_hash(key_data)
+        with self.lock:
+            slot, state = self.__find_slot(key_data, key_hash)
+            self.__write(
+                slot, _USED, key_hash, key_data, value_data, expire_at,
+            )
+            if state != _USED:
+                self.__add_to_count(1)
+
+    def remove(self, key: Any) -> None:
+        """
+        Removes item with `key` from the cache.
+        Raises `KeyError` if there are no such item.
+        """
+
+        if not self.__remove(pickle.dumps(key, _KEY_PROTOCOL)):
+            raise KeyError(key)
+
+    def size(self) -> int:
+        """
+        Returns count of items in cache,
+        including expired ones, those are not replaced yet.
+        """
+
+        return _COUNT.unpack_from(self._buffer, _COUNT_OFFSET)[0]
+
+    def full(self) -> bool:
+        """
+        Checks if every slot is taken.
+        """
+
+        return self.size() >= self.slots
+
+    def stats(self) -> CacheStats:
+        """
+        Returns snapshot of counters of this process.
+        """
+
+        return CacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            inserts=self._inserts,
+            evictions=self._evictions,
+            expirations=self._expired_items,
+            size=self.size(),
+        )
+
+    def reset_stats(self) -> None:
+        """
+        Sets counters of this process to zero.
+        """
+
+        self._hits = self._misses = self._inserts = 0
+        self._evictions = self._expired_items = 0
+
+    def close(self) -> None:
+        """
+        Detaches from segment and deletes it, if this cache created it.
+        """
+
+        # Views of the buffer must be released before it's closed
+        self._buffer = None  # type: ignore
+        self._memory.close()
+
+        if self._owner:
+            self._memory.unlink()
+            self._owner = False
+
+    def __now(self) -> float:
+        if self.clock is None:
+            return monotonic()
+
+        return self.clock()
+
+    def __offset(self, slot: int) -> int:
+        return _HEADER_SIZE + slot * self.slot_size
+
+    def __probe(self, key_hash: int) -> Iterator[int]:
+        start = key_hash % self.slots
+        for step in range(self.max_probe):
+            yield (start + step) % self.slots
+
+    def __lookup(self, key_data: bytes) -> Optional[bytes]:
+        key_hash = _key_hash(key_data)
+        now = self.__now()
+
+        for slot in self.__probe(key_hash):
+            state, value = self.__read(slot, key_hash, key_data, now)
+            if state == _EMPTY:
+                return None
+            if value is not None:
+                _ACCESS.pack_into(
+                    self._buffer, self.__offset(slot) + _ACCESS_OFFSET,
+                    time.time(),
+                )
+                return value
+
+        return None
+
+    def __read(
+        self,
+        slot: int,
+        key_hash: int,
+        key_data: bytes,
+        now: float,
+    ) -> Tuple[int, Optional[bytes]]:
+        buffer, offset = self._buffer, self.__offset(slot)
+
+        for _ in range(_READ_ATTEMPTS):
+            (sequence,) = _SEQUENCE.unpack_from(buffer, offset)
+            if sequence & 1:
+                # Slot is being written
+                time.sleep(0)
+                continue
+
+            _, state, slot_hash, key_length, value_length, expire_at, _ = \
+                _SLOT.unpack_from(buffer, offset)
+
+            value = None
+            if state == _USED and slot_hash == key_hash and now < expire_at:
+                start = offset + _SLOT.size
+                end = start + key_length
+                if buffer[start:end] == key_data:
+                    value = bytes(buffer[end:end + value_length])
+
+            if _SEQUENCE.unpack_from(buffer, offset)[0] == sequence:
+                return state, value
+
+        return _USED, None
+
+    def __find_slot(self, key_data: bytes, key_hash: int) -> Tuple[int, int]:
+        # Called with lock held, so slots don't change
+        buffer = self._buffer
+        now = self.__now()
+        free: Optional[Tuple[int, int]] = None
+        victim, victim_access = 0, _NEVER
+
+        for slot in self.__probe(key_hash):
+            offset = self.__offset(slot)
+            _, state, slot_hash, key_length, _, expire_at, last_access = \
+                _SLOT.unpack_from(buffer, offset)
+
+            if state == _EMPTY:
+                free = free or (slot, state)
+                break
+
+            if state == _REMOVED:
+                free = free or (slot, state)
+                continue
+
+            start = offset + _SLOT.size
+            if slot_hash == key_hash \
+                    and buffer[start:start + key_length] == key_data:
+                return slot, state
+
+            if now >= expire_at:
+                free = free or (slot, state)
+                continue
+
+            if last_access < victim_access:
+                victim, victim_access = slot, last_access
+
+        self._inserts += 1
+        if free is not None:
+            if free[1] == _USED:
+                self._expired_items += 1
+            return free
+
+        self._evictions += 1
+        return victim, _USED
+
+    def __write(
+        self,
+        slot: int,
+        state: int,
+        key_hash: int,
+        key_data: bytes,
+        value_data: bytes,
+        expire_at: float,
+    ) -> None:
+        buffer, offset = self._buffer, self.__offset(slot)
+        # Sequence is already odd, if previous writer died in the middle
+        (sequence,) = _SEQUENCE.unpack_from(buffer, offset)
+        sequence |= 1
+
+        _SEQUENCE.pack_into(buffer, offset, sequence)
+        start = offset + _SLOT.size
+        end = start + len(key_data)
+        buffer[start:end] = key_data
+        buffer[end:end + len(value_data)] = value_data
+        _SLOT.pack_into(
+            buffer, offset, sequence, state, key_hash,
+            len(key_data), len(value_data), expire_at, time.time(),
+        )
+        _SEQUENCE.pack_into(buffer, offset, (sequence + 1) & 0xFFFFFFFF)
+
+    def __remove(self, key_data: bytes) -> bool:
+        key_hash = _key_hash(key_data)
+
+        with self.lock:
+            for slot in self.__probe(key_hash):
+                offset = self.__offset(slot)
+                _, state, slot_hash, key_length, _, _, _ = \
+                    _SLOT.unpack_from(self._buffer, offset)
+
+                if state == _EMPTY:
+                    return False
+
+                start = offset + _SLOT.size
+                if state == _USED and slot_hash == key_hash and \
+                        self._buffer[start:start + key_length] == key_data:
+                    self.__write(slot, _REMOVED, 0, b"", b"", _NEVER)
+                    self.__add_to_count(-1)
+                    return True
+
+        return False
+
+    def __add_to_count(self, delta: int) -> None:
+        _COUNT.pack_into(
+            self._buffer, _COUNT_OFFSET, self.size() + delta,
+        )
@@ -0,0 +1,17 @@
+"""
+Simulator comparing replacement policies on synthetic and recorded workloads.
+"""
+
+from mycache.simulator.runner import (
+    POLICIES, SimulationResult, compare, format_results, simulate
+)
+from mycache.simulator.workloads import (
+    WORKLOADS, loop, read_recording, read_trace, scan_mixed, shifting, zipf
+)
+
+
+__all__ = [
+    "POLICIES", "SimulationResult", "compare", "format_results", "simulate",
+    "WORKLOADS", "loop", "read_recording", "read_trace", "scan_mixed",
+    "shifting", "zipf",
+]
@@ -0,0 +1,6 @@
+import sys
+
+from mycache.simulator.cli import main
+
+
+sys.exit(main())
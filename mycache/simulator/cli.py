@@ -0,0 +1,89 @@
+"""
+Command line interface of simulator.
+"""
+
+import argparse
+from typing import Any, Iterable, List, Optional
+
+from mycache.simulator.runner import POLICIES, compare, format_results
+from mycache.simulator.workloads import (
+    WORKLOADS, read_recording, read_trace
+)
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="mycache-simulator",
+        description="Compares hit ratio, speed and memory of policies.",
+    )
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument(
+        "--workload", choices=sorted(WORKLOADS), default="zipf",
+        help="synthetic workload (default: zipf)",
+    )
+    source.add_argument(
+        "--trace", metavar="PATH",
+        help="text file with one key per line",
+    )
+    source.add_argument(
+        "--recording", metavar="PATH",
+        help="file written by TraceRecorder",
+    )
+    parser.add_argument(
+        "--keys", type=int, default=10_000,
+        help="count of distinct keys in synthetic workload",
+    )
+    parser.add_argument(
+        "--requests", type=int, default=100_000,
+        help="count of requests in synthetic workload",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=None,
+        help="seed of synthetic workload",
+    )
+    parser.add_argument(
+        "--capacity", type=int, action="append",
+        help="cache size, can be repeated (default: 1000)",
+    )
+    parser.add_argument(
+        "--policy", choices=sorted(POLICIES), action="append",
+        help="policy to simulate, can be repeated (default: all)",
+    )
+    parser.add_argument(
+        "--no-memory", action="store_true",
+        help="don't measure peak memory",
+    )
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Runs simulation and prints table of results.
+    """
+
+    args = _parser().parse_args(argv)
+
+    keys: Iterable[Any]
+    if args.trace:
+        keys = read_trace(args.trace)
+    elif args.recording:
+        keys = read_recording(args.recording)
+    else:
+        keys = WORKLOADS[args.workload](
+            args.keys, args.requests, seed=args.seed,
+        )
+
+    policies = {
+        name: POLICIES[name]
+        for name in args.policy or POLICIES
+    }
+    results = compare(
+        policies,
+        args.capacity or [1000],
+        keys,
+        measure_memory=not args.no_memory,
+    )
+
+    print(format_results(results))
+    return 0
@@ -0,0 +1,155 @@
+"""
+Replays keys against cache and measures how well it does.
+"""
+
+import time
+import tracemalloc
+from typing import (
+    Any, Callable, Dict, Iterable, List, Mapping, NamedTuple, Sequence
+)
+
+from mycache.cache import Cache
+from mycache.policies import (
+    ARC, CLOCK, LFU, LRU, Policy, Random, SIEVE, SLRU, WTinyLFU
+)
+
+
+PolicyFactory = Callable[[], Policy[Any]]
+
+
+POLICIES: Dict[str, PolicyFactory] = {
+    "random": Random,
+    "lru": LRU,
+    "lfu": LFU,
+    "wtinylfu": WTinyLFU,
+    "slru": SLRU,
+    "arc": ARC,
+    "clock": CLOCK,
+    "sieve": SIEVE,
+}
+
+
+class SimulationResult(NamedTuple):
+    """
+    Outcome of replaying keys against cache with single policy.
+
+    `peak_memory` is peak of memory allocated during replay in bytes,
+    it's zero, when memory is not measured.
+    """
+
+    policy: str
+    capacity: int
+    requests: int
+    hits: int
+    ops_per_second: float
+    peak_memory: int
+
+    @property
+    def hit_ratio(self) -> float:
+        """
+        Returns share of requests served from cache.
+        """
+
+        if self.requests == 0:
+            return 0.0
+
+        return self.hits / self.requests
+
+
+def _replay(
+    policy_factory: PolicyFactory,
+    capacity: int,
+    keys: Sequence[Any],
+) -> int:
+    cache: Cache[Any, Any] = Cache(
+        copy_keys=False,
+        max_items=capacity,
+        replacement_policy=policy_factory(),
+    )
+
+    for key in keys:
+        try:
+            cache.get(key)
+        except KeyError:
+            cache.save(key, key)
+
+    return cache.stats().hits
+
+
+def simulate(
+    policy_factory: PolicyFactory,
+    capacity: int,
+    keys: Iterable[Any],
+    name: str = "",
+    measure_memory: bool = True,
+) -> SimulationResult:
+    """
+    Looks up every key in cache of `capacity` items
+    and saves it on miss.
+
+    Memory is measured by a separate replay,
+    because `tracemalloc` slows down the timed one.
+    """
+
+    keys = list(keys)
+
+    started = time.perf_counter()
+    hits = _replay(policy_factory, capacity, keys)
+    elapsed = time.perf_counter() - started
+
+    peak_memory = 0
+    if measure_memory:
+        tracemalloc.start()
+        try:
+            _replay(policy_factory, capacity, keys)
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return SimulationResult(
+        policy=name or getattr(policy_factory, "__name__", ""),
+        capacity=capacity,
+        requests=len(keys),
+        hits=hits,
+        ops_per_second=len(keys) / elapsed if elapsed else float("inf"),
+        peak_memory=peak_memory,
+    )
+
+
+def compare(
+    policies: Mapping[str, PolicyFactory],
+    capacities: Iterable[int],
+    keys: Iterable[Any],
+    measure_memory: bool = True,
+) -> List[SimulationResult]:
+    """
+    Simulates every policy with every capacity on the same keys.
+    """
+
+    keys = list(keys)
+
+    return [
+        simulate(factory, capacity, keys, name, measure_memory)
+        for capacity in capacities
+        for name, factory in policies.items()
+    ]
+
+
+def format_results(results: Iterable[SimulationResult]) -> str:
+    """
+    Formats results as text table.
+    """
+
+    lines = [
+        f"{'policy':<10} {'capacity':>10} {'hit ratio':>10}"
+        f" {'ops/s':>12} {'peak KiB':>10}"
+    ]
+
+    for result in results:
+        lines.append(
+            f"{result.policy:<10} {result.capacity:>10}"
+            f" {result.hit_ratio:>10.4f} {result.ops_per_second:>12,.0f}"
+            f" {result.peak_memory / 1024:>10,.1f}"
+        )
+
+    return "\n".join(lines)
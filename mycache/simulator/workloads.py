@@ -0,0 +1,138 @@
+"""
+Generators of cache keys.
+
+Every synthetic workload yields `count` integer keys
+and is reproducible with `seed`.
+"""
+
+import itertools
+import random
+from typing import Callable, Dict, Iterator, List, Optional
+
+from mycache.recorder import Operation, read_events
+
+
+_CHUNK = 4096
+
+
+def _zipf_weights(keys: int, alpha: float) -> List[float]:
+    return list(itertools.accumulate(
+        1 / (rank ** alpha) for rank in range(1, keys + 1)
+    ))
+
+
+def zipf(
+    keys: int,
+    count: int,
+    alpha: float = 1.0,
+    seed: Optional[int] = None,
+) -> Iterator[int]:
+    """
+    Yields keys from `range(keys)` with Zipfian distribution,
+    key `0` is the most popular one.
+    """
+
+    rng = random.Random(seed)
+    weights = _zipf_weights(keys, alpha)
+    population = range(keys)
+
+    while count > 0:
+        chunk = min(count, _CHUNK)
+        yield from rng.choices(population, cum_weights=weights, k=chunk)
+        count -= chunk
+
+
+def scan_mixed(
+    keys: int,
+    count: int,
+    scan_ratio: float = 0.2,
+    alpha: float = 1.0,
+    seed: Optional[int] = None,
+) -> Iterator[int]:
+    """
+    Yields Zipfian keys mixed with `scan_ratio` of keys
+    those are requested only once, like in sequential scan.
+    """
+
+    rng = random.Random(seed)
+    popular = zipf(keys, count, alpha, rng.randrange(2 ** 32))
+    scan = itertools.count(keys)
+
+    for _ in range(count):
+        if rng.random() < scan_ratio:
+            yield next(scan)
+        else:
+            yield next(popular)
+
+
+def loop(
+    keys: int,
+    count: int,
+    seed: Optional[int] = None,
+) -> Iterator[int]:
+    """
+    Yields keys from `range(keys)` in the same order over and over.
+    Recency based policies miss every time,
+    when cache is smaller than the loop.
+    """
+
+    del seed  # Loop is deterministic
+    return itertools.islice(itertools.cycle(range(keys)), count)
+
+
+def shifting(
+    keys: int,
+    count: int,
+    hot_ratio: float = 0.1,
+    hot_share: float = 0.9,
+    phases: int = 4,
+    seed: Optional[int] = None,
+) -> Iterator[int]:
+    """
+    Yields `hot_share` of keys from hot set of `hot_ratio * keys` keys,
+    rest of keys are uniform.
+    Hot set moves to other keys `phases` times.
+    """
+
+    rng = random.Random(seed)
+    hot_size = max(1, int(keys * hot_ratio))
+    phase_length = max(1, count // phases)
+
+    for index in range(count):
+        if rng.random() < hot_share:
+            phase = index // phase_length
+            yield (phase * hot_size + rng.randrange(hot_size)) % keys
+        else:
+            yield rng.randrange(keys)
+
+
+def read_trace(path: str) -> Iterator[str]:
+    """
+    Yields keys from text file with one key per line.
+    Blank lines are skipped.
+    """
+
+    with open(path, "r", encoding="utf-8") as trace:
+        for line in trace:
+            key = line.strip()
+            if key:
+                yield key
+
+
+def read_recording(path: str) -> Iterator[int]:
+    """
+    Yields hashes of keys looked up with `get`
+    in file written by `TraceRecorder`.
+    """
+
+    for event in read_events(path):
+        if event.operation == Operation.GET:
+            yield event.key
+
+
+WORKLOADS: Dict[str, Callable[..., Iterator[int]]] = {
+    "zipf": zipf,
+    "scan": scan_mixed,
+    "loop": loop,
+    "shifting": shifting,
+}
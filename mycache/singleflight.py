@@ -0,0 +1,73 @@
+"""
+Coalescing of concurrent calls with equal keys.
+"""
+
+import threading
+from typing import Any, Callable, Generic, Optional, TypeVar
+
+from mycache.nohashmap import Map
+
+
+Key = TypeVar("Key")
+Value = TypeVar("Value")
+
+
+class _Call:
+    """
+    Call in progress, shared between its callers.
+    """
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight(Generic[Key, Value]):
+    """
+    Runs only one call per key at a time.
+
+    Callers asking for a key which is being computed by another thread
+    wait for that call and share its result or exception.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Map[Key, _Call] = Map(copy_keys=False)
+
+    def do(self, key: Key, function: Callable[[], Value]) -> Value:
+        """
+        Returns result of `function` called for `key`,
+        joining call already running for the same key, if any.
+        """
+
+        with self._lock:
+            try:
+                call = self._calls[key]
+                leader = False
+            except KeyError:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+
+            return call.result  # type: ignore
+
+        try:
+            call.result = function()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+            call.done.set()
+
+        return call.result  # type: ignore
@@ -0,0 +1,104 @@
+"""
+Compact probabilistic frequency counter.
+"""
+
+from typing import Any, List
+
+from mycache.nohashmap import fingerprint
+
+
+_MASK_64 = (1 << 64) - 1
+_SEEDS = (
+    0x9E3779B97F4A7C15,
+    0xC2B2AE3D27D4EB4F,
+    0x165667B19E3779F9,
+    0x27D4EB2F165667C5,
+)
+_MAX_COUNT = 15
+_HALVE = bytes(count >> 1 for count in range(256))
+
+
+def key_hash(key: Any) -> int:
+    """
+    Returns hash of `key`, even unhashable one.
+    """
+
+    try:
+        return hash(key)
+    except TypeError:
+        return hash(fingerprint(key))
+
+
+class CountMinSketch:
+    """
+    Count-min sketch, estimates how often keys were added.
+
+    Counters are stored in a single `bytearray` of `depth` rows,
+    each of `width` counters capped at 15, so memory doesn't depend
+    on number of keys. After `sample_size` additions all counters
+    are halved, so old history fades away.
+    """
+
+    def __init__(
+        self,
+        width: int,
+        depth: int = 4,
+        sample_size: int = 0,
+    ) -> None:
+        if not 1 <= depth <= len(_SEEDS):
+            raise ValueError(f"depth must be from 1 to {len(_SEEDS)}")
+
+        self._width = 16
+        while self._width < width:
+            self._width *= 2
+
+        # Multiplicative hashing, highest bits are the best mixed
+        self._shift = 64 - (self._width.bit_length() - 1)
+        self._seeds = _SEEDS[:depth]
+        self._table = bytearray(self._width * depth)
+        self._sample_size = sample_size or 10 * self._width
+        self._additions = 0
+
+    def add(self, key: Any) -> None:
+        """
+        Counts one more occurrence of `key`.
+        """
+
+        table = self._table
+        indexes = self.__indexes(key)
+        count = min(table[index] for index in indexes)
+
+        if count < _MAX_COUNT:
+            # Conservative update: only the smallest counters grow
+            for index in indexes:
+                if table[index] == count:
+                    table[index] = count + 1
+
+        self._additions += 1
+        if self._additions >= self._sample_size:
+            self.reset()
+
+    def frequency(self, key: Any) -> int:
+        """
+        Returns estimated count of `key` occurrences.
+        """
+
+        table = self._table
+        return min(table[index] for index in self.__indexes(key))
+
+    def reset(self) -> None:
+        """
+        Halves all counters.
+        """
+
+        self._table = self._table.translate(_HALVE)
+        self._additions //= 2
+
+    def __indexes(self, key: Any) -> List[int]:
+        key_bits = key_hash(key) & _MASK_64
+        width, shift = self._width, self._shift
+
+        return [
+            row * width + ((key_bits * seed & _MASK_64) >> shift)
+            for row, seed in enumerate(self._seeds)
+        ]
@@ -0,0 +1,80 @@
+"""
+Cache statistics.
+"""
+
+from typing import List, NamedTuple
+
+
+class CacheStats(NamedTuple):
+    """
+    Snapshot of cache counters.
+
+    `evictions` counts items replaced by replacement policy
+    and `expirations` counts expired items purged from cache.
+    """
+
+    hits: int
+    misses: int
+    inserts: int
+    evictions: int
+    expirations: int
+    size: int
+
+
+class LatencyHistogram:
+    """
+    Histogram of durations.
+
+    Bucket `n` counts durations shorter than 2 ** n microseconds,
+    but not shorter than 2 ** (n - 1), the last bucket counts
+    all longer durations.
+    """
+
+    def __init__(self, buckets: int = 32) -> None:
+        self._counts = [0] * buckets
+
+    def record(self, duration: float) -> None:
+        """
+        Counts `duration` in seconds.
+        """
+
+        bucket = int(duration * 1_000_000).bit_length()
+        self._counts[min(bucket, len(self._counts) - 1)] += 1
+
+    def counts(self) -> List[int]:
+        """
+        Returns copy of bucket counts.
+        """
+
+        return list(self._counts)
+
+    def total(self) -> int:
+        """
+        Returns count of recorded durations.
+        """
+
+        return sum(self._counts)
+
+    def percentile(self, fraction: float) -> float:
+        """
+        Returns upper bound in seconds of bucket
+        containing `fraction` of recorded durations.
+        """
+
+        counts = self.counts()
+        rank = fraction * sum(counts)
+        seen = 0
+
+        for bucket, count in enumerate(counts):
+            seen += count
+            if count and seen >= rank:
+                return (2 ** bucket) / 1_000_000
+
+        return 0.0
+
+    def reset(self) -> None:
+        """
+        Forgets all recorded durations.
+        """
+
+        self._counts = [0] * len(self._counts)
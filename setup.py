@@ -6,7 +6,7 @@ with open("README.md", "r", encoding="utf-8") as fh:
 
 setup(
     name="mycache",
-    packages=find_packages(include="mycache"),
+    packages=find_packages(include=["mycache", "mycache.*"]),
     version="0.0.1",
     description="Python Implements Caching",
     long_description=long_description,
@@ -16,6 +16,13 @@ setup(
     author_email="17817462542@163.com",
     license="MIT",
 
+    entry_points={
+        "console_scripts": [
+            "mycache-simulator=mycache.simulator.cli:main",
+            "mycache-server=mycache.remote.server:main",
+        ],
+    },
+
     install_requires=[
     ],
     setup_requires=[
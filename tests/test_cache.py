@@ -1,3 +1,7 @@
+import copy
+import pickle
+import threading
+import time
 from datetime import timedelta
 from typing import Any
 
@@ -5,7 +9,11 @@ from freezegun import freeze_time  # type: ignore
 import pytest
 
 from mycache import Cache
-from mycache.policies import LRU, Policy
+from mycache.cache import CacheItem, sizeof
+from mycache.clock import ManualClock
+from mycache.policies import (
+    ARC, CLOCK, LFU, LRU, SIEVE, SLRU, Policy, Random, WTinyLFU,
+)
 
 
 def test_cache_saves_items() -> None:
@@ -114,10 +122,340 @@ def test_disable_copy_keys_can_cause_bugs() -> None:
     bugged_cache.save(key, value)
     key[0] = 2  # mutating the key
 
-    assert bugged_cache.has(key)
-    assert bugged_cache.has([2])
+    # Mutated key is stored under fingerprint of the old value
+    assert not bugged_cache.has(key)
+    assert not bugged_cache.has([2])
     assert not bugged_cache.has([1])
 
     assert not copy_cache.has(key)
     assert not copy_cache.has([2])
     assert copy_cache.has([1])
+
+
+@pytest.mark.parametrize(
+    "policy_type", [Random, LRU, LFU, WTinyLFU, SLRU, ARC, CLOCK, SIEVE],
+)
+def test_cache_evicts_mutated_keys(policy_type: Any) -> None:
+    cache: Cache[Any, Any] = Cache(
+        copy_keys=False, max_items=2, replacement_policy=policy_type(),
+    )
+    keys = [[1], [2]]
+    for key in keys:
+        cache.save(key, 1)
+        cache.get(key)
+    for key in keys:
+        key[0] += 2
+
+    for number in range(10):
+        cache.save(number, number)
+        cache.get(number, None)
+
+    assert cache.size() == 2
+
+
+def test_cache_updates_existing_items() -> None:
+    lru: Policy[Any] = LRU()
+    cache: Cache[Any, Any] = Cache(max_items=2, replacement_policy=lru)
+
+    cache.save("1", 1)
+    cache.save("2", 2)
+    cache.save("1", 11)
+    assert cache.size() == 2
+    assert cache.get("1") == 11
+
+    cache.save("3", 3)
+    assert cache.has("1")
+    assert not cache.has("2")
+
+
+def test_cache_keeps_items_with_renewed_expiration() -> None:
+    cache: Cache[Any, Any] = Cache(max_items=2)
+
+    with freeze_time("2020-10-01 12:00:00"):
+        cache.save("1", 1, expire_in=timedelta(seconds=10))
+        cache.save("1", 1, expire_in=timedelta(seconds=30))
+        cache.save("2", 2, expire_in=timedelta(seconds=10))
+
+    with freeze_time("2020-10-01 12:00:10"):
+        cache.save("3", 3)
+
+        assert cache.has("1")
+        assert cache.has("3")
+        assert not cache.has("2")
+
+
+def test_cache_purges_many_expired_items() -> None:
+    cache: Cache[Any, Any] = Cache(max_items=100)
+
+    with freeze_time("2020-10-01 12:00:00"):
+        for key in range(50):
+            cache.save(key, key)
+
+        for key in range(50, 100):
+            cache.save(key, key, expire_in=timedelta(seconds=key))
+
+    with freeze_time("2020-10-01 12:01:15"):
+        cache.save("new", "new")
+
+        assert cache.size() == 75
+        assert all(cache.has(key) for key in range(50))
+        assert not any(cache.has(key) for key in range(50, 76))
+        assert all(cache.has(key) for key in range(76, 100))
+
+
+def test_cache_uses_given_clock() -> None:
+    clock = ManualClock()
+    cache: Cache[Any, Any] = Cache(clock=clock)
+
+    cache.save("1", 1, expire_in=10)
+    cache.save("2", 2, expire_in=timedelta(seconds=20))
+
+    clock.advance(10)
+    assert not cache.has("1")
+    assert cache.get("2") == 2
+
+    clock.advance(10)
+    assert not cache.has("2")
+
+
+def test_cache_get_many() -> None:
+    clock = ManualClock()
+    cache: Cache[Any, Any] = Cache(clock=clock)
+    cache.save("1", 1)
+    cache.save([2], 2)
+    cache.save("3", 3, expire_in=10)
+    clock.advance(10)
+
+    found, missing = cache.get_many(["1", [2], "3", "4"])
+
+    assert list(found.items()) == [("1", 1), ([2], 2)]
+    assert missing == ["3", "4"]
+
+
+def test_cache_save_many() -> None:
+    cache: Cache[Any, Any] = Cache()
+
+    cache.save_many({"1": 1, "2": 2})
+    cache.save_many([([3], 3), ("1", 11)], expire_in=10)
+
+    assert cache.size() == 3
+    assert cache.get("1") == 11
+    assert cache.get([3]) == 3
+
+
+def test_cache_save_many_replaces_just_enough_items() -> None:
+    lru: Policy[Any] = LRU()
+    cache: Cache[Any, Any] = Cache(max_items=4, replacement_policy=lru)
+    cache.save_many([("1", 1), ("2", 2), ("3", 3), ("4", 4)])
+
+    cache.save_many([("2", 22), ("5", 5), ("6", 6)])
+
+    assert cache.size() == 4
+    assert not cache.has("1")
+    assert not cache.has("3")
+    assert cache.get("2") == 22
+
+
+def test_cache_save_many_keeps_last_items() -> None:
+    cache: Cache[Any, Any] = Cache(max_items=2)
+    cache.save("1", 1)
+
+    cache.save_many([(key, key) for key in range(5)])
+
+    assert cache.size() == 2
+    assert cache.has(3)
+    assert cache.has(4)
+
+
+@pytest.mark.parametrize(
+    "policy_type", [Random, LRU, LFU, WTinyLFU, SLRU, ARC, CLOCK, SIEVE],
+)
+def test_cache_save_many_updates_and_adds_items(policy_type: Any) -> None:
+    cache: Cache[Any, Any] = Cache(
+        max_items=2, replacement_policy=policy_type(),
+    )
+    cache.save("1", 1)
+    cache.save("2", 2)
+
+    cache.save_many([("1", 11), ("2", 22), ("3", 3)])
+
+    assert cache.size() == 2
+    assert cache.get("2") == 22
+    assert cache.get("3") == 3
+    assert cache.stats().evictions == 1
+
+
+def test_cache_save_many_keeps_updated_items() -> None:
+    lru: Policy[Any] = LRU()
+    cache: Cache[Any, Any] = Cache(max_items=1, replacement_policy=lru)
+    cache.save("a", 1)
+
+    cache.save_many([("a", 2), ("b", 3)])
+
+    assert cache.size() == 1
+    assert cache.get("b") == 3
+    assert cache.stats().inserts == 2
+
+
+def test_cache_save_many_purges_expired_items() -> None:
+    clock = ManualClock()
+    cache: Cache[Any, Any] = Cache(max_items=3, clock=clock)
+    cache.save("1", 1, expire_in=10)
+    cache.save("2", 2)
+    cache.save("3", 3, expire_in=10)
+    clock.advance(10)
+
+    cache.save_many([("4", 4), ("5", 5)])
+
+    assert cache.size() == 3
+    assert cache.has("2")
+
+
+def test_cache_remove_many() -> None:
+    cache: Cache[Any, Any] = Cache()
+    cache.save_many([("1", 1), ([2], 2), ("3", 3)])
+
+    cache.remove_many(["1", [2], "4"])
+
+    assert cache.size() == 1
+    assert cache.has("3")
+
+
+def test_cache_keeps_weight_lesser_than_max_weight() -> None:
+    lru: Policy[Any] = LRU()
+    cache: Cache[Any, Any] = Cache(
+        max_weight=10,
+        weigher=lambda key, value: len(value),
+        replacement_policy=lru,
+    )
+
+    cache.save("1", "aaaa")
+    cache.save("2", "bbbb")
+    assert cache.weight() == 8
+
+    cache.save("3", "cccccc")
+    assert cache.weight() == 10
+    assert not cache.has("1")
+    assert cache.has("2")
+
+    cache.save("3", "cc")
+    cache.save("4", "dddd")
+    assert cache.weight() == 10
+    assert cache.has("2")
+
+    cache.remove("4")
+    assert cache.weight() == 6
+
+
+def test_cache_doesnt_save_too_heavy_items() -> None:
+    cache: Cache[Any, Any] = Cache(
+        max_weight=10,
+        weigher=lambda key, value: len(value),
+    )
+
+    cache.save("1", "a")
+    cache.save("1", "a" * 11)
+
+    assert not cache.has("1")
+    assert cache.weight() == 0
+
+
+def test_cache_weighs_items_by_size_by_default() -> None:
+    cache: Cache[Any, Any] = Cache(max_weight=10_000)
+
+    cache.save("1", "a" * 1000)
+    assert cache.weight() == sizeof("1", "a" * 1000)
+
+    for key in range(100):
+        cache.save(key, "a" * 1000)
+    assert cache.weight() <= 10_000
+
+
+def test_cache_get_returns_default() -> None:
+    clock = ManualClock()
+    cache: Cache[Any, Any] = Cache(clock=clock)
+    cache.save("1", 1, expire_in=10)
+
+    assert cache.get("1", None) == 1
+    assert cache.get("2", None) is None
+    clock.advance(10)
+    assert cache.get("1", 0) == 0
+    assert cache.stats().misses == 2
+
+
+def test_cache_peek_doesnt_update_policy() -> None:
+    cache: Cache[Any, Any] = Cache(max_items=2, replacement_policy=LRU())
+    cache.save("1", 1)
+    cache.save("2", 2)
+
+    assert cache.peek("1") == 1
+    assert cache.peek("3") is None
+    assert cache.peek("3", 0) == 0
+    cache.save("3", 3)
+
+    assert not cache.has("1")
+    assert cache.stats().hits == cache.stats().misses == 0
+
+
+def test_cache_get_or_load() -> None:
+    clock = ManualClock()
+    cache: Cache[Any, Any] = Cache(clock=clock)
+    calls = []
+
+    def load() -> int:
+        calls.append(1)
+        return len(calls)
+
+    assert cache.get_or_load([1], load, expire_in=10) == 1
+    assert cache.get_or_load([1], load, expire_in=10) == 1
+    clock.advance(10)
+    assert cache.get_or_load([1], load) == 2
+    assert cache.get([1]) == 2
+
+
+def test_cache_get_or_load_calls_loader_once() -> None:
+    cache: Cache[Any, Any] = Cache()
+    calls = []
+
+    def load() -> int:
+        calls.append(1)
+        time.sleep(0.05)
+        return 1
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(cache.get_or_load("1", load)),
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [1] * 8
+    assert len(calls) == 1
+
+
+def test_cache_can_be_copied() -> None:
+    clock = ManualClock()
+    cache: Cache[Any, Any] = Cache(clock=clock)
+    cache.save([1], 1, expire_in=10)
+
+    for clone in (pickle.loads(pickle.dumps(cache)), copy.deepcopy(cache)):
+        assert clone.get_or_load([1], lambda: 2) == 1
+        assert clone.get_or_load("2", lambda: 2) == 2
+        assert isinstance(clone.clock, ManualClock)
+        clone.clock.advance(10)
+        assert not clone.has([1])
+
+
+def test_cache_stores_cache_items_as_values() -> None:
+    cache: Cache[Any, Any] = Cache()
+    value = CacheItem(1, expire_at=0)
+
+    cache.save("1", value)
+
+    assert cache.get("1") is value
+    assert cache.peek("1") is value
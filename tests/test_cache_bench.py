@@ -0,0 +1,137 @@
+import itertools
+import tracemalloc
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Optional
+
+import pytest
+
+from mycache import Cache
+from mycache.recorder import TraceRecorder
+
+
+SIZES = [1_000, 10_000, 100_000]
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_full_cache_save_performance(benchmark: Any, size: int) -> None:
+    cache: Cache[Any, int] = Cache(max_items=size)
+    for key in range(size):
+        cache.save(key, key, expire_in=timedelta(hours=1))
+
+    new_keys = itertools.count(size)
+
+    def save_to_full_cache() -> None:
+        key = next(new_keys)
+        cache.save(key, key, expire_in=timedelta(hours=1))
+
+    benchmark(save_to_full_cache)
+
+
+def test_save_many_performance(benchmark: Any) -> None:
+    cache: Cache[Any, int] = Cache(max_items=10_000)
+    batches = itertools.count()
+
+    def save_batch() -> None:
+        start = next(batches) * 10_000
+        cache.save_many((key, key) for key in range(start, start + 10_000))
+
+    benchmark(save_batch)
+
+
+def test_save_loop_performance(benchmark: Any) -> None:
+    cache: Cache[Any, int] = Cache(max_items=10_000)
+    batches = itertools.count()
+
+    def save_batch() -> None:
+        start = next(batches) * 10_000
+        for key in range(start, start + 10_000):
+            cache.save(key, key)
+
+    benchmark(save_batch)
+
+
+def test_get_or_load_performance(benchmark: Any) -> None:
+    cache: Cache[Any, int] = Cache(max_items=1000)
+    keys = itertools.cycle(range(2000))
+
+    def lookup() -> None:
+        key = next(keys)
+        cache.get_or_load(key, lambda: key)
+
+    benchmark(lookup)
+
+
+def test_has_get_save_performance(benchmark: Any) -> None:
+    cache: Cache[Any, int] = Cache(max_items=1000)
+    keys = itertools.cycle(range(2000))
+
+    def lookup() -> None:
+        key = next(keys)
+        if cache.has(key):
+            cache.get(key)
+        else:
+            cache.save(key, key)
+
+    benchmark(lookup)
+
+
+@pytest.mark.parametrize("sample_rate", [None, 0.01, 1.0])
+def test_recorded_get_performance(
+    benchmark: Any,
+    tmp_path: Path,
+    sample_rate: Optional[float],
+) -> None:
+    recorder = None
+    if sample_rate is not None:
+        recorder = TraceRecorder(
+            str(tmp_path / "trace.bin"), sample_rate=sample_rate,
+        )
+
+    cache: Cache[Any, int] = Cache(recorder=recorder)
+    for key in range(10_000):
+        cache.save(key, key)
+
+    keys = itertools.cycle(range(10_000))
+
+    def get_from_cache() -> None:
+        cache.get(next(keys))
+
+    benchmark(get_from_cache)
+
+    if recorder is not None:
+        recorder.close()
+
+
+def test_snapshot_load_performance(benchmark: Any, tmp_path: Path) -> None:
+    path = str(tmp_path / "snapshot")
+    cache: Cache[Any, int] = Cache()
+    cache.save_many((key, key) for key in range(100_000))
+    cache.dump(path)
+
+    def load_snapshot() -> None:
+        Cache().load(path)
+
+    benchmark(load_snapshot)
+
+
+@pytest.mark.parametrize("expire_in", [None, 60])
+def test_entry_memory(benchmark: Any, expire_in: Optional[int]) -> None:
+    count = 1_000_000
+    # Keys and value are allocated beforehand,
+    # so only memory of entries is traced
+    keys = [str(key) for key in range(count)]
+
+    def fill() -> int:
+        tracemalloc.start()
+        try:
+            cache: Cache[Any, int] = Cache(max_items=count)
+            for key in keys:
+                cache.save(key, 0, expire_in)
+            return tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+
+    used = benchmark.pedantic(fill, rounds=1)
+
+    benchmark.extra_info["bytes_per_entry"] = used / count
@@ -1,6 +1,14 @@
+import pickle
+import threading
+import time
+from typing import List
 from unittest.mock import Mock
 
-from mycache import cache
+import pytest
+
+from mycache import cache, cache_many
+from mycache.clock import ManualClock
+from mycache.decorators import make_key
 
 
 def test_it_prevents_function_calls() -> None:
@@ -26,3 +34,223 @@ def test_it_prevents_function_calls() -> None:
 
     wrapped_function(y="y", x="x")
     assert function.call_count == 3
+
+
+def test_it_caches_unhashable_arguments() -> None:
+    function = Mock()
+    wrapped_function = cache()(function)
+
+    wrapped_function([1], x={"y"})
+    wrapped_function([1], x={"y"})
+    assert function.call_count == 1
+
+    wrapped_function([1], x={"z"})
+    assert function.call_count == 2
+
+
+def test_it_separates_types_with_typed() -> None:
+    function = Mock()
+    wrapped_function = cache(typed=True)(function)
+
+    wrapped_function(1)
+    wrapped_function(1.0)
+    assert function.call_count == 2
+
+    wrapped_function(x=1)
+    wrapped_function(x=1.0)
+    assert function.call_count == 4
+
+    wrapped_function(1)
+    wrapped_function(x=1.0)
+    assert function.call_count == 4
+
+
+def test_it_accepts_custom_key() -> None:
+    function = Mock()
+    wrapped_function = cache(key=lambda x, y: x)(function)
+
+    wrapped_function(1, 2)
+    wrapped_function(1, 3)
+    assert function.call_count == 1
+
+    wrapped_function(2, 2)
+    assert function.call_count == 2
+
+
+def test_make_key() -> None:
+    assert make_key((1,), {}) == 1
+    assert make_key(("1",), {}) == "1"
+    assert make_key((1, 2), {}) == (1, 2)
+    assert make_key((1,), {"b": 2, "a": 3}) \
+        == make_key((1,), {"a": 3, "b": 2})
+    assert make_key((1,), {"a": 2}) != make_key((1, "a", 2), {})
+    assert make_key((1,), {}, typed=True) != make_key((1.0,), {}, typed=True)
+    assert pickle.loads(pickle.dumps(make_key((), {"a": 1}))) \
+        == make_key((), {"a": 1})
+
+
+def test_it_expires_results_by_clock() -> None:
+    clock = ManualClock()
+    function = Mock()
+    wrapped_function = cache(expire_in=5, clock=clock)(function)
+
+    wrapped_function()
+    clock.advance(4)
+    wrapped_function()
+    assert function.call_count == 1
+
+    clock.advance(1)
+    wrapped_function()
+    assert function.call_count == 2
+
+
+def test_single_flight_computes_once() -> None:
+    calls: List[int] = []
+    barrier = threading.Barrier(8)
+
+    @cache(single_flight=True)
+    def slow_function(x: int) -> int:
+        calls.append(x)
+        time.sleep(0.05)
+        return x + 1
+
+    results: List[int] = []
+
+    def call() -> None:
+        barrier.wait()
+        results.append(slow_function(1))
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    assert results == [2] * 8
+    assert slow_function(1) == 2
+    assert calls == [1]
+
+    slow_function.cache_reset_stats()  # type: ignore
+    slow_function(2)
+    slow_function(2)
+    stats = slow_function.cache_stats()  # type: ignore
+    assert (stats.hits, stats.misses) == (1, 1)
+
+
+def test_single_flight_doesnt_cache_exceptions() -> None:
+    function = Mock(side_effect=[ValueError("failed"), "value"])
+    wrapped_function = cache(single_flight=True)(function)
+
+    with pytest.raises(ValueError):
+        wrapped_function()
+
+    assert wrapped_function() == "value"
+    assert wrapped_function() == "value"
+    assert function.call_count == 2
+
+
+def test_cache_many_loads_only_missing_keys() -> None:
+    function = Mock(side_effect=lambda keys: [key * 10 for key in keys])
+    wrapped_function = cache_many()(function)
+
+    assert wrapped_function([1, 2]) == [10, 20]
+    assert wrapped_function([2, 3, 3, 1]) == [20, 30, 30, 10]
+    assert wrapped_function([3]) == [30]
+
+    assert [call[0][0] for call in function.call_args_list] == [[1, 2], [3]]
+
+
+def test_cache_many_checks_result_length() -> None:
+    wrapped_function = cache_many()(lambda keys: [])
+
+    with pytest.raises(ValueError):
+        wrapped_function([1])
+
+
+def test_refresh_after_serves_old_result_while_refreshing() -> None:
+    clock = ManualClock()
+    results = iter(["first", "second"])
+    refreshed = threading.Event()
+    release = threading.Event()
+
+    def load() -> str:
+        result = next(results)
+        if result == "second":
+            release.wait(5)
+            refreshed.set()
+        return result
+
+    function = cache(refresh_after=10, clock=clock)(load)
+    assert function() == "first"
+
+    clock.advance(10)
+    assert function() == "first"
+    assert function() == "first"  # refresh is running already
+
+    release.set()
+    assert refreshed.wait(5)
+    for _ in range(500):
+        if function() == "second":
+            break
+        time.sleep(0.01)
+
+    assert function() == "second"
+
+
+def test_stale_ttl_serves_expired_result() -> None:
+    clock = ManualClock()
+    calls: List[int] = []
+    refreshed = threading.Event()
+
+    def load() -> int:
+        calls.append(1)
+        if len(calls) == 2:
+            refreshed.set()
+        return len(calls)
+
+    function = cache(expire_in=10, stale_ttl=5, clock=clock)(load)
+    assert function() == 1
+
+    clock.advance(12)
+    assert function() == 1
+    assert refreshed.wait(5)
+
+    for _ in range(500):
+        if function() == 2:
+            break
+        time.sleep(0.01)
+
+    # Refreshed result is past stale period, so function is called at once
+    clock.advance(20)
+    assert function() == 3
+    assert len(calls) == 3
+
+
+def test_failed_refresh_keeps_result() -> None:
+    clock = ManualClock()
+    calls: List[int] = []
+    failed = threading.Event()
+
+    def load() -> int:
+        calls.append(1)
+        if len(calls) > 1:
+            failed.set()
+            raise ValueError()
+        return 1
+
+    function = cache(refresh_after=1, clock=clock)(load)
+    assert function() == 1
+
+    clock.advance(1)
+    assert function() == 1
+    assert failed.wait(5)
+    time.sleep(0.05)
+
+    assert function() == 1
+    assert len(calls) <= 3
+
+
+def test_refresh_requires_time_to_refresh() -> None:
+    with pytest.raises(ValueError):
+        cache(stale_ttl=5)
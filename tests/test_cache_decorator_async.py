@@ -0,0 +1,137 @@
+import asyncio
+from typing import Any, List
+
+import pytest
+
+from mycache import cache
+from mycache.clock import ManualClock
+
+
+def test_it_caches_coroutine_results() -> None:
+    calls: List[int] = []
+
+    @cache()
+    async def function(x: int) -> int:
+        calls.append(x)
+        await asyncio.sleep(0)
+        return x + 1
+
+    async def main() -> None:
+        assert await function(1) == 2
+        assert await function(1) == 2
+        assert await function(2) == 3
+
+    asyncio.run(main())
+    assert calls == [1, 2]
+
+
+def test_concurrent_awaiters_share_task() -> None:
+    calls: List[int] = []
+
+    @cache()
+    async def function(x: int) -> int:
+        calls.append(x)
+        await asyncio.sleep(0.01)
+        return x + 1
+
+    async def main() -> List[Any]:
+        return await asyncio.gather(*[function(1) for _ in range(10)])
+
+    assert asyncio.run(main()) == [2] * 10
+    assert calls == [1]
+
+
+def test_exceptions_are_not_cached() -> None:
+    calls: List[int] = []
+
+    @cache()
+    async def function() -> int:
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        if len(calls) == 1:
+            raise ValueError("failed")
+        return 42
+
+    async def main() -> None:
+        results = await asyncio.gather(
+            function(), function(),
+            return_exceptions=True,
+        )
+        assert all(isinstance(result, ValueError) for result in results)
+
+        assert await function() == 42
+        assert await function() == 42
+
+    asyncio.run(main())
+    assert len(calls) == 2
+
+
+def test_cancelled_awaiter_doesnt_cancel_others() -> None:
+    calls: List[int] = []
+
+    @cache()
+    async def function() -> int:
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 42
+
+    async def main() -> None:
+        cancelled = asyncio.ensure_future(function())
+        waiting = asyncio.ensure_future(function())
+        await asyncio.sleep(0.01)
+
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+
+        assert await waiting == 42
+        assert await function() == 42
+
+    asyncio.run(main())
+    assert calls == [1]
+
+
+def test_cancelled_task_isnt_cached() -> None:
+    calls: List[int] = []
+
+    @cache()
+    async def function() -> int:
+        calls.append(1)
+        if len(calls) == 1:
+            raise asyncio.CancelledError()
+        return 42
+
+    async def main() -> None:
+        with pytest.raises(asyncio.CancelledError):
+            await function()
+
+        assert await function() == 42
+
+    asyncio.run(main())
+    assert len(calls) == 2
+
+
+def test_stale_result_is_refreshed_by_task() -> None:
+    clock = ManualClock()
+    calls: List[int] = []
+
+    @cache(expire_in=10, stale_ttl=10, clock=clock)
+    async def function() -> int:
+        calls.append(1)
+        await asyncio.sleep(0)
+        return len(calls)
+
+    async def main() -> None:
+        assert await function() == 1
+
+        clock.advance(15)
+        results = await asyncio.gather(function(), function())
+        assert results == [1, 1]
+
+        for _ in range(10):
+            await asyncio.sleep(0)
+
+        assert calls == [1, 1]
+        assert await function() == 2
+
+    asyncio.run(main())
@@ -0,0 +1,43 @@
+import functools
+import random
+from typing import Any
+
+from mycache import cache
+
+
+def test_cache_decorator_hit_performance(benchmark: Any) -> None:
+    @cache()
+    def function(x: int, y: int = 0) -> int:
+        return x + y
+
+    def call_cached_function() -> None:
+        for x in range(100):
+            function(x, y=1)
+
+    call_cached_function()
+    benchmark(call_cached_function)
+
+
+def test_lru_cache_hit_performance(benchmark: Any) -> None:
+    @functools.lru_cache(maxsize=None)
+    def function(x: int, y: int = 0) -> int:
+        return x + y
+
+    def call_cached_function() -> None:
+        for x in range(100):
+            function(x, y=1)
+
+    call_cached_function()
+    benchmark(call_cached_function)
+
+
+def test_cache_decorator_unhashable_hit_performance(benchmark: Any) -> None:
+    @cache()
+    def function(x: Any) -> Any:
+        return x
+
+    def call_cached_function() -> None:
+        key = random.randint(1, 75)
+        function({"key": key})
+
+    benchmark(call_cached_function)
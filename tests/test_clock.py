@@ -0,0 +1,35 @@
+import time
+from datetime import timedelta
+
+from mycache.clock import CoarseClock, ManualClock, seconds
+
+
+def test_seconds() -> None:
+    assert seconds(None) is None
+    assert seconds(5) == 5.0
+    assert seconds(timedelta(minutes=1)) == 60.0
+
+
+def test_manual_clock() -> None:
+    clock = ManualClock()
+    assert clock() == 0.0
+
+    clock.advance(1.5)
+    assert clock() == 1.5
+
+    clock.advance(timedelta(seconds=10))
+    assert clock() == 11.5
+
+
+def test_coarse_clock_ticks() -> None:
+    clock = CoarseClock(resolution=0.001)
+    try:
+        start = clock()
+        time.sleep(0.05)
+        assert clock() > start
+    finally:
+        clock.stop()
+
+    stopped = clock()
+    time.sleep(0.01)
+    assert clock() == stopped
@@ -0,0 +1,234 @@
+import threading
+from pathlib import Path
+from typing import Any, Iterator
+
+import pytest
+
+from mycache import Cache, cache
+from mycache.clock import ManualClock
+from mycache.disk import DiskStore
+from mycache.policies import LRU
+
+
+@pytest.fixture
+def disk(tmp_path: Path) -> Iterator[DiskStore]:
+    with DiskStore(str(tmp_path / "segment")) as store:
+        yield store
+
+
+def test_store_values(disk: DiskStore) -> None:
+    disk.save("a", {"x": [1, 2]})
+    disk.save("b", b"bytes")
+    disk.save("c", b"")
+
+    assert len(disk) == 3
+    assert "a" in disk
+    assert disk.get("a") == {"x": [1, 2]}
+    assert disk.get("c") == b""
+
+    value = disk.get("b")
+    assert isinstance(value, memoryview)
+    assert value.readonly
+    assert value == b"bytes"
+    assert type(disk.get("b", copy=True)) is bytes
+
+
+def test_replace_and_discard(disk: DiskStore) -> None:
+    disk.save("a", b"first")
+    disk.save("a", b"second")
+
+    assert disk.get("a") == b"second"
+    assert disk.size_bytes() == 6
+    assert disk.file_size() == 11
+
+    assert disk.discard("a")
+    assert not disk.discard("a")
+    with pytest.raises(KeyError):
+        disk.get("a")
+
+
+def test_pop_and_expiration(disk: DiskStore) -> None:
+    disk.save("a", 1, expire_at=10)
+    disk.save("b", 2, expire_at=10)
+
+    assert disk.has("a", now=5)
+    assert disk.pop("a", now=5) == (1, 10)
+    assert "a" not in disk
+
+    assert not disk.has("b", now=10)
+    with pytest.raises(KeyError):
+        disk.get("b", now=10)
+    assert "b" not in disk
+
+
+def test_pop_copies_bytes_like_values(disk: DiskStore) -> None:
+    disk.save("a", b"bytes")
+    disk.save("b", bytearray(b"array"))
+    disk.save("c", memoryview(b"view"))
+
+    value, _ = disk.pop("a")
+    assert type(value) is bytes
+    assert value == b"bytes"
+
+    value, _ = disk.pop("b")
+    assert type(value) is bytearray
+    value[0] = ord("A")
+
+    value, _ = disk.pop("c")
+    assert isinstance(value, memoryview)
+    assert value == b"view"
+
+
+def test_unpicklable_value_replaces_old_one(disk: DiskStore) -> None:
+    disk.save("a", 1)
+
+    disk.save("a", lambda: 2)
+
+    assert "a" not in disk
+
+
+def test_max_bytes_drops_oldest(tmp_path: Path) -> None:
+    with DiskStore(str(tmp_path / "segment"), max_bytes=10) as disk:
+        disk.save("a", b"aaaa")
+        disk.save("b", b"bbbb")
+        disk.save("a", b"AAAA")
+        disk.save("c", b"cccc")
+        disk.save("huge", b"h" * 11)
+
+        assert "b" not in disk
+        assert "huge" not in disk
+        assert disk.get("a") == b"AAAA"
+        assert disk.get("c") == b"cccc"
+        assert disk.size_bytes() == 8
+
+
+def test_compaction(tmp_path: Path) -> None:
+    path = tmp_path / "segment"
+
+    with DiskStore(str(path), min_garbage=100) as disk:
+        disk.save("kept", b"k" * 10)
+        view = disk.get("kept")
+
+        for _ in range(20):
+            disk.save("replaced", b"r" * 10)
+
+        assert disk.file_size() <= 2 * disk.size_bytes() + 100
+        assert disk.get("kept") == b"k" * 10
+        assert disk.get("replaced") == b"r" * 10
+        assert path.stat().st_size == disk.file_size()
+        assert view == b"k" * 10
+
+    assert not path.exists()
+
+
+def test_cache_spills_evicted_items(disk: DiskStore) -> None:
+    memo: Cache[Any, Any] = Cache(
+        max_items=2, replacement_policy=LRU(), disk=disk,
+    )
+    memo.save([1], "one")
+    memo.save([2], "two")
+    memo.save([3], "three")
+
+    assert memo.size() == 2
+    assert [1] in disk
+    assert memo.has([1])
+
+    assert memo.get([1]) == "one"
+    assert [1] not in disk
+    assert [2] in disk
+    assert memo.stats().hits == 1
+
+    found, missing = memo.get_many([[2], [3], [4]])
+    assert sorted(found.values()) == ["three", "two"]
+    assert missing == [[4]]
+    assert memo.stats().hits == 3
+
+
+def test_cache_drops_unpicklable_items(disk: DiskStore) -> None:
+    memo: Cache[Any, Any] = Cache(max_items=1, disk=disk)
+    memo.save("a", threading.Lock())
+
+    memo.save("b", 1)
+
+    assert memo.get("b") == 1
+    assert not memo.has("a")
+    assert len(disk) == 0
+
+
+def test_cache_disk_expiration(disk: DiskStore) -> None:
+    clock = ManualClock()
+    memo: Cache[Any, Any] = Cache(
+        max_items=1, replacement_policy=LRU(), clock=clock, disk=disk,
+    )
+    memo.save("a", 1, expire_in=10)
+    memo.save("b", 2)
+
+    clock.advance(5)
+    assert memo.get("a") == 1
+    assert "b" in disk
+
+    clock.advance(5)
+    memo.save("c", 3)
+    with pytest.raises(KeyError):
+        memo.get("a")
+    assert "a" not in disk
+
+
+def test_cache_remove_from_disk(disk: DiskStore) -> None:
+    memo: Cache[Any, Any] = Cache(max_items=1, disk=disk)
+    memo.save("a", 1)
+    memo.save("b", 2)
+
+    memo.remove("a")
+    assert not memo.has("a")
+    with pytest.raises(KeyError):
+        memo.remove("a")
+
+    memo.save("c", 3)
+    memo.remove_many(["b", "c"])
+    assert len(disk) == 0
+    assert memo.size() == 0
+
+
+def test_saved_item_replaces_disk_copy(disk: DiskStore) -> None:
+    memo: Cache[Any, Any] = Cache(max_items=1, disk=disk)
+    memo.save("a", 1)
+    memo.save("b", 2)
+    memo.save("a", 10)
+
+    assert memo.get("a") == 10
+    assert "a" not in disk
+
+
+def test_cache_promotes_values_of_original_type(
+    disk: DiskStore,
+    tmp_path: Path,
+) -> None:
+    memo: Cache[Any, Any] = Cache(
+        max_items=1, replacement_policy=LRU(), disk=disk,
+    )
+    memo.save("a", b"bytes")
+    memo.save("b", bytearray(b"array"))
+    memo.save("c", 1)
+
+    assert memo.peek("a") == b"bytes"
+    assert type(memo.peek("a")) is bytes
+    assert memo.get("a").decode() == "bytes"
+    value = memo.get("b")
+    assert type(value) is bytearray
+    assert memo.dump(str(tmp_path / "snapshot")) == 1
+
+
+def test_decorator_loads_from_disk(disk: DiskStore) -> None:
+    calls = []
+
+    @cache(max_items=1, disk=disk)
+    def function(x: int) -> bytes:
+        calls.append(x)
+        return bytes([x])
+
+    assert function(1) == b"\x01"
+    assert function(2) == b"\x02"
+    assert function(1) == b"\x01"
+    assert calls == [1, 2]
+    assert isinstance(function(1), bytes)
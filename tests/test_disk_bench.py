@@ -0,0 +1,23 @@
+import random
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from mycache.disk import DiskStore
+
+
+@pytest.mark.parametrize("value", [b"x" * 4096, {"x": list(range(100))}])
+def test_disk_get_performance(
+    benchmark: Any,
+    tmp_path: Path,
+    value: Any,
+) -> None:
+    with DiskStore(str(tmp_path / "segment")) as disk:
+        for key in range(10_000):
+            disk.save(key, value)
+
+        def get_from_disk() -> None:
+            disk.get(random.randrange(10_000))
+
+        benchmark(get_from_disk)
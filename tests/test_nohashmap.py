@@ -2,6 +2,7 @@ from typing import Any
 import pytest
 
 from mycache import Map
+from mycache.nohashmap import fingerprint, unhashable
 
 
 def test_map_constructors() -> None:
@@ -216,10 +217,27 @@ def test_map_allows_to_disable_deepcopy() -> None:
     assert key in pycaches_map
 
     key["another"] = "value"
-    assert key in pycaches_map
+    assert list(pycaches_map)[0] is key
     assert {"some": "key"} not in pycaches_map
 
 
+def test_map_removes_mutated_keys() -> None:
+    pycaches_map: Map[Any, int] = Map(copy_keys=False)
+    first, second = [1], [2]
+    pycaches_map[first] = 1
+    pycaches_map[second] = 2
+
+    first[0] = 3
+    second[0] = 4
+    assert pycaches_map.pop([4], None) is None
+
+    assert pycaches_map.pop(first) == 1
+    del pycaches_map[second]
+    assert len(pycaches_map) == 0
+    with pytest.raises(KeyError):
+        pycaches_map.pop([5])
+
+
 def test_map_saves_nested_unhashables() -> None:
     pycaches_map: Map[Any, str] = Map()
     key = ({1}, {2})
@@ -227,3 +245,38 @@ def test_map_saves_nested_unhashables() -> None:
 
     pycaches_map[key] = value
     assert pycaches_map[key] == value
+
+
+def test_map_groups_unhashable_keys_by_fingerprint() -> None:
+    pycaches_map: Map[Any, str] = Map()
+    examples = [
+        ([1, 2], "list value"),
+        ((1, 2), "tuple value"),
+        ({1: 2}, "dict value"),
+        ({1, 2}, "set value"),
+        ([{1: [2]}], "nested value"),
+    ]
+
+    for key, value in examples:
+        pycaches_map[key] = value
+
+    for key, value in examples:
+        assert pycaches_map[key] == value
+
+    del pycaches_map[[1, 2]]
+    assert [1, 2] not in pycaches_map
+    assert pycaches_map[(1, 2)] == "tuple value"
+    assert len(pycaches_map) == len(examples) - 1
+
+
+def test_fingerprint_of_equal_values() -> None:
+    assert fingerprint({"a": 1, "b": [2]}) == fingerprint({"b": [2], "a": 1})
+    assert fingerprint([{1}, {2: 3}]) == fingerprint([{1}, {2: 3}])
+    assert fingerprint(bytearray(b"key")) == fingerprint(b"key")
+    assert fingerprint(1) == 1
+
+
+def test_unhashable() -> None:
+    assert unhashable([1])
+    assert unhashable((1, [2]))
+    assert not unhashable((1, 2))
@@ -0,0 +1,351 @@
+import random
+from typing import Any
+
+import pytest
+
+from mycache import Cache
+from mycache.policies import (
+    ARC, CLOCK, LFU, LRU, Policy, Random, SIEVE, SLRU, WTinyLFU
+)
+
+
+def test_lru_replaces_least_recent_key() -> None:
+    lru: Policy[Any] = LRU()
+    lru.add("1")
+    lru.add("2")
+    lru.add("3")
+    assert lru.next_to_replace() == "1"
+
+    lru.access("1")
+    assert lru.next_to_replace() == "2"
+
+    lru.remove("2")
+    assert lru.next_to_replace() == "3"
+
+
+def test_lru_ignores_unknown_keys() -> None:
+    lru: Policy[Any] = LRU()
+    lru.add("1")
+
+    lru.access("2")
+    assert lru.next_to_replace() == "1"
+
+    with pytest.raises(KeyError):
+        lru.remove("2")
+
+
+def test_lru_raises_on_empty() -> None:
+    lru: Policy[Any] = LRU()
+
+    with pytest.raises(IndexError):
+        lru.next_to_replace()
+
+
+def test_lru_supports_unhashable_keys() -> None:
+    lru: Policy[Any] = LRU()
+    lru.add(["1"])
+    lru.add({"2": 2})
+    lru.add({3})
+
+    lru.access(["1"])
+    assert lru.next_to_replace() == {"2": 2}
+
+    lru.remove({"2": 2})
+    assert lru.next_to_replace() == {3}
+
+
+def test_random_replaces_stored_keys() -> None:
+    policy: Policy[Any] = Random()
+    keys = [["1"], {"2": 2}, {3}, "4", 5]
+    for key in keys:
+        policy.add(key)
+
+    for _ in range(20):
+        assert policy.next_to_replace() in keys
+
+
+def test_random_removes_keys() -> None:
+    policy: Policy[Any] = Random()
+    keys = [["1"], {"2": 2}, {3}, "4", 5]
+    for key in keys:
+        policy.add(key)
+
+    for key in keys[:-1]:
+        policy.remove(key)
+
+    assert policy.next_to_replace() == 5
+
+    policy.remove(5)
+    with pytest.raises(IndexError):
+        policy.next_to_replace()
+
+
+def test_random_replaces_keys_added_again() -> None:
+    policy: Policy[Any] = Random()
+    keys = [["1"], {"2": 2}, {3}, "4", 5]
+    for key in keys:
+        policy.add(key)
+
+    policy.remove(5)
+    policy.remove(["1"])
+    policy.add(5)
+
+    replaced = set()
+    for _ in range(4):
+        key = policy.next_to_replace()
+        replaced.add(repr(key))
+        policy.remove(key)
+
+    assert replaced == {"{'2': 2}", "{3}", "'4'", "5"}
+    with pytest.raises(IndexError):
+        policy.next_to_replace()
+
+
+def test_lfu_replaces_least_frequent_key() -> None:
+    lfu: Policy[Any] = LFU()
+    for key in ["1", "2", "3"]:
+        lfu.add(key)
+
+    lfu.access("1")
+    lfu.access("1")
+    lfu.access("2")
+    assert lfu.next_to_replace() == "3"
+
+    lfu.access("3")
+    assert lfu.next_to_replace() == "2"
+
+    lfu.remove("2")
+    assert lfu.next_to_replace() == "3"
+
+    lfu.add("4")
+    assert lfu.next_to_replace() == "4"
+
+
+def test_lfu_ignores_unknown_keys() -> None:
+    lfu: Policy[Any] = LFU()
+    lfu.add(["1"])
+
+    lfu.access(["2"])
+    assert lfu.next_to_replace() == ["1"]
+
+    with pytest.raises(KeyError):
+        lfu.remove(["2"])
+
+    lfu.remove(["1"])
+    with pytest.raises(IndexError):
+        lfu.next_to_replace()
+
+
+def test_lfu_ages_frequencies() -> None:
+    lfu: Policy[Any] = LFU(aging_period=8)
+    lfu.add("hot")
+    for _ in range(7):
+        lfu.access("hot")
+
+    lfu.add("new")
+    lfu.access("new")
+    assert lfu.next_to_replace() == "new"
+
+    # After a few aging rounds "new" catches up with "hot"
+    for _ in range(3):
+        for _ in range(8):
+            lfu.access("new")
+
+    assert lfu.next_to_replace() == "hot"
+
+
+def test_lfu_policy_in_cache() -> None:
+    cache: Cache[Any, Any] = Cache(max_items=2, replacement_policy=LFU())
+    cache.save("1", 1)
+    cache.save("2", 2)
+    cache.get("1")
+
+    cache.save("3", 3)
+    assert cache.has("1")
+    assert not cache.has("2")
+
+
+def test_wtinylfu_keeps_frequent_keys_during_scan() -> None:
+    def hot_hits_during_scan(policy: Policy[Any]) -> int:
+        cache: Cache[Any, Any] = Cache(
+            max_items=100,
+            replacement_policy=policy,
+        )
+        for _ in range(5):
+            for key in range(80):
+                if not cache.has(key):
+                    cache.save(key, key)
+
+        hits = 0
+        for index, key in enumerate(range(1000, 3000)):
+            if not cache.has(key):
+                cache.save(key, key)
+
+            hot_key = index % 80
+            if cache.has(hot_key):
+                hits += 1
+            else:
+                cache.save(hot_key, hot_key)
+
+        return hits
+
+    assert hot_hits_during_scan(WTinyLFU()) > 1000
+    assert hot_hits_during_scan(LRU()) < 100
+
+
+def test_tinylfu_rejects_rare_keys() -> None:
+    cache: Cache[Any, Any] = Cache(
+        max_items=2,
+        replacement_policy=WTinyLFU(),
+    )
+    cache.save("1", 1)
+    cache.save("2", 2)
+    for _ in range(3):
+        cache.get("1")
+        cache.get("2")
+
+    cache.save("3", 3)
+    assert cache.size() == 2
+    assert cache.has("1")
+    assert cache.has("2")
+
+    for _ in range(5):
+        cache.has("4")
+    cache.save("4", 4)
+    assert cache.get("4") == 4
+
+
+def test_slru_protects_accessed_keys() -> None:
+    cache: Cache[Any, Any] = Cache(max_items=4, replacement_policy=SLRU())
+    for key in range(4):
+        cache.save(key, key)
+    cache.get(0)
+    cache.get(1)
+
+    for key in range(10, 20):
+        cache.save(key, key)
+
+    assert cache.has(0)
+    assert cache.has(1)
+    assert cache.has(19)
+
+
+def test_slru_demotes_protected_keys() -> None:
+    slru: Policy[Any] = SLRU(protected_ratio=0.5)
+    slru.set_capacity(4)
+    for key in range(4):
+        slru.add(key)
+    for key in range(4):
+        slru.access(key)
+
+    # Only two keys fit into protected segment
+    assert slru.next_to_replace() == 0
+    slru.remove(0)
+    assert slru.next_to_replace() == 1
+
+
+def test_arc_protects_frequent_keys() -> None:
+    cache: Cache[Any, Any] = Cache(max_items=4, replacement_policy=ARC())
+    for key in range(4):
+        cache.save(key, key)
+    cache.get(0)
+    cache.get(1)
+
+    cache.save(4, 4)
+    assert not cache.has(2)
+
+    for key in range(10, 20):
+        cache.save(key, key)
+
+    assert cache.has(0)
+    assert cache.has(1)
+
+
+def test_arc_adapts_to_recently_replaced_keys() -> None:
+    arc: ARC[Any] = ARC()
+    cache: Cache[Any, Any] = Cache(max_items=4, replacement_policy=arc)
+    for key in range(4):
+        cache.save(key, key)
+    cache.get(0)
+    cache.get(1)
+    cache.save(4, 4)
+
+    # Replaced key is remembered and saved again as frequent one
+    cache.save(2, 2)
+    assert cache.has(2)
+    assert 2 in arc._frequent  # pylint: disable=W0212
+
+
+def test_arc_bounds_ghost_keys() -> None:
+    arc: ARC[Any] = ARC()
+    cache: Cache[Any, Any] = Cache(max_items=10, replacement_policy=arc)
+    rng = random.Random(42)
+
+    for _ in range(5000):
+        key = rng.randrange(50)
+        if not cache.has(key):
+            cache.save(key, [key])
+
+    # pylint: disable=W0212
+    assert len(arc._recent_ghosts) + len(arc._frequent_ghosts) <= 10
+    assert cache.size() == 10
+
+
+@pytest.mark.parametrize("policy_type", [CLOCK, SIEVE])
+def test_visited_keys_get_second_chance(policy_type: Any) -> None:
+    policy: Policy[Any] = policy_type()
+    policy.set_capacity(3)
+    for key in ["1", ["2"], {"3"}]:
+        policy.add(key)
+
+    policy.access("1")
+    assert policy.next_to_replace() == ["2"]
+
+    policy.remove(["2"])
+    policy.add("4")
+    policy.access({"3"})
+    policy.access("4")
+    assert policy.next_to_replace() == "1"
+
+
+@pytest.mark.parametrize("policy_type", [CLOCK, SIEVE])
+def test_visited_policies_ignore_unknown_keys(policy_type: Any) -> None:
+    policy: Policy[Any] = policy_type()
+
+    with pytest.raises(IndexError):
+        policy.next_to_replace()
+
+    policy.access("1")
+    with pytest.raises(KeyError):
+        policy.remove("1")
+
+
+@pytest.mark.parametrize("policy_type", [CLOCK, SIEVE])
+def test_visited_policies_in_cache(policy_type: Any) -> None:
+    cache: Cache[Any, Any] = Cache(
+        max_items=10,
+        replacement_policy=policy_type(),
+    )
+    rng = random.Random(42)
+
+    for _ in range(2000):
+        key = rng.randrange(30)
+        if cache.has(key):
+            continue
+
+        cache.save(key, key)
+        if rng.random() < 0.1:
+            cache.remove(key)
+
+    assert cache.size() <= 10
+
+
+def test_clock_grows_without_capacity() -> None:
+    clock: Policy[Any] = CLOCK()
+    for key in range(5):
+        clock.add(key)
+        clock.access(key)
+
+    clock.remove(2)
+    clock.add(5)
+    assert clock.next_to_replace() == 5
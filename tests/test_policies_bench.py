@@ -0,0 +1,64 @@
+import itertools
+import random
+from typing import Any
+
+import pytest
+
+from mycache import Cache
+from mycache.policies import CLOCK, LFU, LRU, Random, SIEVE
+
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_lru_hit_performance(benchmark: Any, size: int) -> None:
+    cache: Cache[Any, int] = Cache(max_items=size, replacement_policy=LRU())
+    for key in range(size):
+        cache.save(key, key)
+
+    def get_from_cache() -> None:
+        key = random.randrange(size)
+        _ = cache.get(key)
+
+    benchmark(get_from_cache)
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_random_replacement_performance(benchmark: Any, size: int) -> None:
+    policy: Random[int] = Random()
+    for key in range(size):
+        policy.add(key)
+
+    new_keys = itertools.count(size)
+
+    def replace_key() -> None:
+        policy.remove(policy.next_to_replace())
+        policy.add(next(new_keys))
+
+    benchmark(replace_key)
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_lfu_access_performance(benchmark: Any, size: int) -> None:
+    policy: LFU[int] = LFU()
+    for key in range(size):
+        policy.add(key)
+
+    def access_key() -> None:
+        policy.access(random.randrange(size))
+
+    benchmark(access_key)
+
+
+@pytest.mark.parametrize("policy_type", [LRU, CLOCK, SIEVE])
+def test_policy_hit_performance(benchmark: Any, policy_type: Any) -> None:
+    policy = policy_type()
+    policy.set_capacity(100_000)
+    for key in range(100_000):
+        policy.add(key)
+
+    def access_key() -> None:
+        policy.access(random.randrange(100_000))
+
+    benchmark(access_key)
@@ -0,0 +1,182 @@
+from pathlib import Path
+from typing import Any, List
+
+import pytest
+
+from mycache import Cache, cache
+from mycache.recorder import (
+    Operation, TraceEvent, TraceRecorder, read_events, trace_key
+)
+from mycache.simulator import read_recording
+from mycache.simulator.cli import main
+
+
+def summary(path: Path) -> List[Any]:
+    return [
+        (event.operation, event.key, event.hit)
+        for event in read_events(str(path))
+    ]
+
+
+def test_cache_records_operations(tmp_path: Path) -> None:
+    path = tmp_path / "trace.bin"
+
+    with TraceRecorder(str(path)) as recorder:
+        memo: Cache[Any, Any] = Cache(max_items=1, recorder=recorder)
+        memo.save("a", 1)
+        memo.get("a")
+        memo.has("b")
+        with pytest.raises(KeyError):
+            memo.get("b")
+        memo.save("b", 2)
+        memo.remove("b")
+
+    assert summary(path) == [
+        (Operation.SAVE, trace_key("a"), False),
+        (Operation.GET, trace_key("a"), True),
+        (Operation.HAS, trace_key("b"), False),
+        (Operation.GET, trace_key("b"), False),
+        (Operation.SAVE, trace_key("b"), False),
+        (Operation.REMOVE, trace_key("b"), True),
+    ]
+
+
+def test_bulk_operations_are_recorded(tmp_path: Path) -> None:
+    path = tmp_path / "trace.bin"
+
+    with TraceRecorder(str(path)) as recorder:
+        memo: Cache[Any, Any] = Cache(recorder=recorder)
+        memo.save_many({1: 1, 2: 2})
+        memo.get_many([1, 3])
+        memo.remove_many([2, 3])
+
+    assert summary(path) == [
+        (Operation.SAVE, 1, False),
+        (Operation.SAVE, 2, False),
+        (Operation.GET, 1, True),
+        (Operation.GET, 3, False),
+        (Operation.REMOVE, 2, True),
+    ]
+
+
+def test_decorator_records_calls(tmp_path: Path) -> None:
+    path = tmp_path / "trace.bin"
+
+    with TraceRecorder(str(path)) as recorder:
+        @cache(recorder=recorder)
+        def function(x: Any) -> Any:
+            return x
+
+        function([1])
+        function([1])
+
+    events = list(read_events(str(path)))
+    assert [event.operation for event in events] == [
+        Operation.GET, Operation.SAVE, Operation.GET,
+    ]
+    assert [event.hit for event in events] == [False, False, True]
+    assert len({event.key for event in events}) == 1
+    assert all(event.timestamp > 0 for event in events)
+
+
+def test_ring_buffer_drops_oldest_events(tmp_path: Path) -> None:
+    path = tmp_path / "trace.bin"
+    recorder = TraceRecorder(str(path), capacity=4)
+
+    # Writing is blocked, like by slow disk
+    with recorder._write_lock:
+        for key in range(10):
+            recorder.record(Operation.GET, key, False)
+
+    recorder.close()
+
+    assert recorder.dropped() == 6
+    assert [key for _, key, _ in summary(path)] == [6, 7, 8, 9]
+
+
+def test_background_flush(tmp_path: Path) -> None:
+    path = tmp_path / "trace.bin"
+
+    with TraceRecorder(str(path), flush_interval=0.01) as recorder:
+        recorder.record(Operation.GET, "a", True)
+
+        for _ in range(500):
+            if path.stat().st_size > 8:
+                break
+            recorder._wakeup.wait(0.01)
+
+        assert len(summary(path)) == 1
+
+
+def test_sampling_keeps_whole_key_history(tmp_path: Path) -> None:
+    path = tmp_path / "trace.bin"
+
+    with TraceRecorder(str(path), sample_rate=0.25) as recorder:
+        for _ in range(2):
+            for key in range(1000):
+                recorder.record(Operation.GET, key, False)
+
+    keys = [key for _, key, _ in summary(path)]
+    assert 150 < len(set(keys)) < 350
+    assert keys[:len(keys) // 2] == keys[len(keys) // 2:]
+
+
+def test_recording_is_appended(tmp_path: Path) -> None:
+    path = tmp_path / "trace.bin"
+
+    for key in ["a", "b"]:
+        with TraceRecorder(str(path)) as recorder:
+            recorder.record(Operation.SAVE, key, False)
+
+    assert [key for _, key, _ in summary(path)] == [
+        trace_key("a"), trace_key("b"),
+    ]
+
+
+def test_truncated_recording(tmp_path: Path) -> None:
+    path = tmp_path / "trace.bin"
+
+    with TraceRecorder(str(path)) as recorder:
+        recorder.record(Operation.GET, 1, True)
+        recorder.record(Operation.GET, 2, True)
+
+    path.write_bytes(path.read_bytes()[:-1])
+
+    events = list(read_events(str(path), chunk_size=1))
+    assert events == [TraceEvent(Operation.GET, 1, events[0].timestamp, True)]
+
+
+def test_invalid_arguments(tmp_path: Path) -> None:
+    path = str(tmp_path / "trace.bin")
+
+    with pytest.raises(ValueError):
+        TraceRecorder(path, sample_rate=0)
+    with pytest.raises(ValueError):
+        TraceRecorder(path, capacity=0)
+
+    (tmp_path / "other.bin").write_bytes(b"garbage")
+    with pytest.raises(ValueError):
+        list(read_events(str(tmp_path / "other.bin")))
+
+
+def test_replay_recording(
+    capsys: pytest.CaptureFixture,
+    tmp_path: Path,
+) -> None:
+    path = tmp_path / "trace.bin"
+
+    with TraceRecorder(str(path)) as recorder:
+        memo: Cache[Any, Any] = Cache(recorder=recorder)
+        for key in ["a", "b", "a", "b"]:
+            try:
+                memo.get(key)
+            except KeyError:
+                memo.save(key, key)
+
+    assert list(read_recording(str(path))) == [
+        trace_key(key) for key in ["a", "b", "a", "b"]
+    ]
+
+    main(["--recording", str(path), "--capacity", "2", "--policy", "lru"])
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[1].split()[:3] == ["lru", "2", "0.5000"]
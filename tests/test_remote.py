@@ -0,0 +1,181 @@
+import asyncio
+import subprocess
+import sys
+import time
+from typing import Any, Iterator, List
+
+import pytest
+
+from mycache import Cache, cache
+from mycache.remote import CacheServer, RemoteCache
+from mycache.remote.protocol import (
+    NO_EXPIRATION, OP_GET, OP_SAVE, STATUS_ERROR, STATUS_MISSING, STATUS_OK
+)
+
+
+def start_server(*args: str) -> Any:
+    process = subprocess.Popen(
+        [sys.executable, "-m", "mycache.remote.server", "--port", "0", *args],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    line = process.stdout.readline()  # type: ignore
+    assert line.startswith("listening on "), line
+    process.address = line.split()[-1]  # type: ignore
+    return process
+
+
+@pytest.fixture(scope="module")
+def servers() -> Iterator[List[str]]:
+    processes = [start_server() for _ in range(3)]
+    yield [process.address for process in processes]
+
+    for process in processes:
+        process.terminate()
+        process.wait()
+        process.stdout.close()
+
+
+@pytest.fixture
+def remote(servers: List[str]) -> Iterator[RemoteCache]:
+    with RemoteCache(servers) as client:
+        yield client
+        client.remove_many(range(-10, 1000))
+        client.remove_many(["a", "b", "ttl", ("t", 1)])
+
+
+def test_save_get_remove(remote: RemoteCache) -> None:
+    remote.save("a", {"value": [1, 2]})
+    remote.save(("t", 1), 1)
+
+    assert remote.has("a")
+    assert remote.get("a") == {"value": [1, 2]}
+    assert remote.get(("t", 1)) == 1
+
+    remote.remove("a")
+    assert not remote.has("a")
+    with pytest.raises(KeyError):
+        remote.get("a")
+    with pytest.raises(KeyError):
+        remote.remove("a")
+
+    assert remote.stats()[:3] == (2, 1, 2)
+
+
+def test_expiration(remote: RemoteCache) -> None:
+    remote.save("ttl", 1, expire_in=0.2)
+    assert remote.get("ttl") == 1
+
+    time.sleep(0.3)
+    assert not remote.has("ttl")
+
+
+def test_bulk_operations_spread_between_servers(
+    remote: RemoteCache,
+    servers: List[str],
+) -> None:
+    remote.save_many((key, key * 2) for key in range(300))
+
+    found, missing = remote.get_many([-1, *range(300)])
+    assert missing == [-1]
+    assert [found[key] for key in range(300)] == [
+        key * 2 for key in range(300)
+    ]
+    assert remote.size() == 300
+
+    owners = {remote.server_of(key) for key in range(300)}
+    assert owners == set(servers)
+
+    for server in servers:
+        with RemoteCache([server]) as single:
+            owned = [
+                key for key in range(300) if remote.server_of(key) == server
+            ]
+            assert single.size() == len(owned)
+
+    remote.remove_many(range(100))
+    assert remote.size() == 200
+
+
+def test_consistent_hashing_moves_few_keys() -> None:
+    addresses = [f"10.0.0.{index}:7379" for index in range(4)]
+    before = RemoteCache(addresses)
+    after = RemoteCache(addresses + ["10.0.0.4:7379"])
+
+    keys = range(10_000)
+    moved = sum(before.server_of(key) != after.server_of(key) for key in keys)
+    assert 1000 < moved < 3000
+    assert all(
+        after.server_of(key) == "10.0.0.4:7379"
+        for key in keys if before.server_of(key) != after.server_of(key)
+    )
+
+
+def test_connections_are_reused(remote: RemoteCache) -> None:
+    for key in range(50):
+        remote.save(key, key)
+        assert remote.get(key) == key
+
+    idle = [server._idle.qsize() for server in remote._servers]
+    assert all(count <= 1 for count in idle)
+
+
+def test_decorator_backend(servers: List[str]) -> None:
+    calls = []
+
+    def function(x: int) -> int:
+        calls.append(x)
+        return x + 1
+
+    with RemoteCache(servers) as first, RemoteCache(servers) as second:
+        assert cache(backend=first)(function)(999) == 1000
+        assert cache(backend=second)(function)(999) == 1000
+        assert calls == [999]
+        first.remove_many([999])
+
+
+def test_server_with_limits() -> None:
+    process = start_server("--max-items", "10")
+
+    try:
+        with RemoteCache([process.address]) as remote:
+            remote.save_many((key, key) for key in range(100))
+            assert remote.size() == 10
+    finally:
+        process.terminate()
+        process.wait()
+        process.stdout.close()
+
+
+def test_execute() -> None:
+    server = CacheServer(Cache(copy_keys=False))
+
+    assert server.execute(OP_GET, b"k", b"", NO_EXPIRATION) == \
+        (STATUS_MISSING, b"")
+    assert server.execute(OP_SAVE, b"k", b"v", NO_EXPIRATION) == \
+        (STATUS_OK, b"")
+    assert server.execute(OP_GET, b"k", b"", NO_EXPIRATION) == \
+        (STATUS_OK, b"v")
+    assert server.execute(99, b"", b"", NO_EXPIRATION)[0] == STATUS_ERROR
+
+
+def test_in_process_server() -> None:
+    async def scenario() -> None:
+        server = CacheServer()
+        host, port = await server.start()
+
+        def use_client() -> Any:
+            with RemoteCache([f"{host}:{port}"]) as remote:
+                remote.save("a", 1)
+                return remote.get("a")
+
+        loop = asyncio.get_running_loop()
+        assert await loop.run_in_executor(None, use_client) == 1
+        await server.close()
+
+    asyncio.run(scenario())
+
+
+def test_no_servers() -> None:
+    with pytest.raises(ValueError):
+        RemoteCache([])
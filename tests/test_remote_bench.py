@@ -0,0 +1,43 @@
+import subprocess
+import sys
+from typing import Any, Iterator
+
+import pytest
+
+from mycache.remote import RemoteCache
+
+
+@pytest.fixture(scope="module")
+def remote() -> Iterator[RemoteCache]:
+    process = subprocess.Popen(
+        [sys.executable, "-m", "mycache.remote.server", "--port", "0"],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    address = process.stdout.readline().split()[-1]  # type: ignore
+
+    with RemoteCache([address]) as client:
+        client.save_many((key, key) for key in range(1000))
+        yield client
+
+    process.terminate()
+    process.wait()
+    process.stdout.close()  # type: ignore
+
+
+def test_remote_get_performance(benchmark: Any, remote: RemoteCache) -> None:
+    def get_one_by_one() -> None:
+        for key in range(100):
+            remote.get(key)
+
+    benchmark(get_one_by_one)
+
+
+def test_remote_get_many_performance(
+    benchmark: Any,
+    remote: RemoteCache,
+) -> None:
+    def get_pipelined() -> None:
+        remote.get_many(range(100))
+
+    benchmark(get_pipelined)
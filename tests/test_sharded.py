@@ -0,0 +1,99 @@
+import threading
+from typing import Any, List
+
+import pytest
+
+from mycache.clock import ManualClock
+from mycache.policies import LRU
+from mycache.sharded import ShardedCache, shard_of
+
+
+def test_sharded_cache_saves_items() -> None:
+    cache: ShardedCache[Any, Any] = ShardedCache(shards=4)
+    keys = ["1", 2, (3,), [4], {"5": 5}, {6}]
+
+    for key in keys:
+        assert not cache.has(key)
+        cache.save(key, str(key))
+
+    for key in keys:
+        assert cache.has(key)
+        assert cache.get(key) == str(key)
+
+    assert cache.size() == len(keys)
+
+    cache.remove([4])
+    assert not cache.has([4])
+    with pytest.raises(KeyError):
+        cache.get([4])
+    assert cache.peek([4]) is None
+    assert cache.peek("1") == "1"
+
+
+def test_sharded_cache_ignores_expired_items() -> None:
+    clock = ManualClock()
+    cache: ShardedCache[Any, Any] = ShardedCache(clock=clock)
+
+    cache.save("1", 1, expire_in=10)
+    clock.advance(10)
+    assert not cache.has("1")
+
+
+@pytest.mark.parametrize(
+    "shards, max_items", [(4, 8), (4, 10), (16, 10), (16, 1)],
+)
+def test_sharded_cache_splits_max_items(shards: int, max_items: int) -> None:
+    cache: ShardedCache[Any, Any] = ShardedCache(
+        shards=shards, max_items=max_items,
+    )
+
+    for key in range(100):
+        cache.save(key, key)
+
+    assert sum(shard.max_items or 0 for shard in cache._caches) == max_items
+    assert cache.size() <= max_items
+
+
+def test_sharded_cache_requires_shards() -> None:
+    with pytest.raises(ValueError):
+        ShardedCache(shards=0)
+
+
+def test_shard_of_equal_keys() -> None:
+    assert shard_of({"a": [1]}, 16) == shard_of({"a": [1]}, 16)
+    assert 0 <= shard_of("key", 16) < 16
+
+
+def test_sharded_cache_survives_concurrent_access() -> None:
+    cache: ShardedCache[Any, Any] = ShardedCache(
+        shards=4,
+        max_items=64,
+        policy_factory=LRU,
+    )
+    errors: List[BaseException] = []
+
+    def work(offset: int) -> None:
+        try:
+            for index in range(2000):
+                key = (offset + index) % 200
+                cache.save(key, key)
+                try:
+                    cache.get(key)
+                    if index % 7 == 0:
+                        cache.remove(key)
+                except KeyError:
+                    pass  # removed by another thread
+        except BaseException as error:  # pylint: disable=W0703
+            errors.append(error)
+
+    threads = [
+        threading.Thread(target=work, args=(offset,))
+        for offset in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert cache.size() <= 64
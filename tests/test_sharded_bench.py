@@ -0,0 +1,41 @@
+import threading
+from typing import Any
+
+import pytest
+
+from mycache.policies import LRU
+from mycache.sharded import ShardedCache
+
+
+THREADS = [1, 2, 4, 8]
+OPERATIONS = 20_000
+
+
+@pytest.mark.parametrize("threads", THREADS)
+def test_sharded_cache_throughput(benchmark: Any, threads: int) -> None:
+    cache: ShardedCache[Any, int] = ShardedCache(
+        max_items=10_000,
+        policy_factory=LRU,
+    )
+    for key in range(10_000):
+        cache.save(key, key)
+
+    def work(offset: int) -> None:
+        for index in range(OPERATIONS // threads):
+            key = (offset * 7919 + index) % 20_000
+            if cache.has(key):
+                cache.get(key)
+            else:
+                cache.save(key, key)
+
+    def run_threads() -> None:
+        workers = [
+            threading.Thread(target=work, args=(offset,))
+            for offset in range(threads)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    benchmark(run_threads)
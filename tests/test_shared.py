@@ -0,0 +1,197 @@
+import multiprocessing
+import struct
+from typing import Any, Iterator
+
+import pytest
+
+from mycache import cache
+from mycache.clock import ManualClock
+from mycache.shared import SharedCache
+
+
+@pytest.fixture
+def shared() -> Iterator[SharedCache]:
+    with SharedCache(slots=64) as memo:
+        yield memo
+
+
+def test_save_get_remove(shared: SharedCache) -> None:
+    shared.save("a", 1)
+    shared.save(("b", 2), {"value": [1, 2]})
+    shared.save("a", 10)
+
+    assert shared.size() == 2
+    assert shared.has("a")
+    assert shared.get("a") == 10
+    assert shared.get(("b", 2)) == {"value": [1, 2]}
+
+    shared.remove("a")
+    assert not shared.has("a")
+    with pytest.raises(KeyError):
+        shared.get("a")
+    with pytest.raises(KeyError):
+        shared.remove("a")
+
+    assert shared.size() == 1
+    assert shared.stats()[:3] == (2, 1, 2)
+
+
+def test_expiration() -> None:
+    clock = ManualClock()
+
+    with SharedCache(slots=1, clock=clock) as shared:
+        shared.save("a", 1, expire_in=10)
+        clock.advance(9)
+        assert shared.get("a") == 1
+
+        clock.advance(1)
+        assert not shared.has("a")
+
+        # Expired item's slot is reused
+        shared.save("b", 2)
+        assert shared.size() == 1
+        assert shared.stats().expirations == 1
+        assert shared.stats().evictions == 0
+
+
+def test_full_probe_window_replaces_least_recently_used() -> None:
+    with SharedCache(slots=4, max_probe=4) as shared:
+        for key in range(4):
+            shared.save(key, key)
+
+        assert shared.full()
+        for key in [0, 2, 3]:
+            shared.get(key)
+
+        shared.save(4, 4)
+
+        assert shared.size() == 4
+        assert not shared.has(1)
+        assert all(shared.has(key) for key in [0, 2, 3, 4])
+        assert shared.stats().evictions == 1
+
+
+def test_item_larger_than_slot_is_not_saved() -> None:
+    with SharedCache(slots=4, slot_size=128) as shared:
+        shared.save("a", "small")
+        shared.save("a", "x" * 128)
+
+        assert not shared.has("a")
+        assert shared.size() == 0
+
+    with pytest.raises(ValueError):
+        SharedCache(slot_size=8)
+
+
+def test_slot_left_by_killed_writer_is_a_miss() -> None:
+    with SharedCache(slots=1) as shared:
+        shared.save("a", 1)
+        # Writer died after marking the only slot as being written
+        buffer = shared._buffer
+        (sequence,) = struct.unpack_from("<I", buffer, 64)
+        struct.pack_into("<I", buffer, 64, sequence + 1)
+
+        assert not shared.has("a")
+        with pytest.raises(KeyError):
+            shared.get("a")
+
+        shared.save("a", 2)
+        assert shared.get("a") == 2
+
+
+def test_attach_to_segment(shared: SharedCache) -> None:
+    shared.save("a", 1)
+
+    attached = SharedCache(shared.name, create=False, lock=shared.lock)
+    assert attached.slots == 64
+    assert attached.get("a") == 1
+
+    attached.save("b", 2)
+    attached.close()
+    assert shared.get("b") == 2
+
+
+def _get_in_spawned_child(shared: SharedCache, queue: Any) -> None:
+    queue.put(shared.get("a"))
+
+
+def test_spawned_process_attaches_by_pickle() -> None:
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+
+    with SharedCache(slots=8, lock=context.Lock()) as shared:
+        shared.save("a", 1)
+
+        child = context.Process(
+            target=_get_in_spawned_child, args=(shared, queue),
+        )
+        child.start()
+        assert queue.get(timeout=30) == 1
+        child.join()
+
+        assert shared.get("a") == 1
+
+
+def _save_in_child(shared: SharedCache, key: Any) -> None:
+    shared.save(key, f"from child {key}")
+
+
+def test_processes_share_items(shared: SharedCache) -> None:
+    context = multiprocessing.get_context("fork")
+    children = [
+        context.Process(target=_save_in_child, args=(shared, key))
+        for key in range(4)
+    ]
+    for child in children:
+        child.start()
+    for child in children:
+        child.join()
+
+    for key in range(4):
+        assert shared.get(key) == f"from child {key}"
+
+
+def test_decorator_shares_results_between_processes(
+    shared: SharedCache,
+) -> None:
+    calls = multiprocessing.get_context("fork").Value("i", 0)
+
+    @cache(backend=shared)
+    def function(x: int) -> int:
+        with calls.get_lock():
+            calls.value += 1
+        return x * 2
+
+    child = multiprocessing.get_context("fork").Process(
+        target=function, args=(21,),
+    )
+    child.start()
+    child.join()
+
+    assert function(21) == 42
+    assert calls.value == 1
+    assert function.cache_stats().hits == 1  # type: ignore
+    assert function.cache_dump is None  # type: ignore
+
+
+def _write_many(shared: SharedCache, count: int) -> None:
+    for index in range(count):
+        shared.save("key", (index, "x" * (index % 50), index))
+
+
+def test_readers_never_see_partial_writes(shared: SharedCache) -> None:
+    child = multiprocessing.get_context("fork").Process(
+        target=_write_many, args=(shared, 20_000),
+    )
+    child.start()
+
+    while child.is_alive():
+        try:
+            first, padding, last = shared.get("key")
+        except KeyError:
+            continue
+
+        assert first == last
+        assert len(padding) == first % 50
+
+    child.join()
@@ -0,0 +1,25 @@
+import random
+from typing import Any
+
+from mycache.shared import SharedCache
+
+
+def test_shared_lookup_performance(benchmark: Any) -> None:
+    with SharedCache(slots=16_384) as shared:
+        # Fill a quarter, so no key is replaced by a neighbour
+        for key in range(4_096):
+            shared.save(key, key)
+
+        def lookup_in_cache() -> None:
+            shared.has(random.randrange(4_096))
+
+        benchmark(lookup_in_cache)
+
+
+def test_shared_save_performance(benchmark: Any) -> None:
+    with SharedCache(slots=16_384) as shared:
+        def save_to_cache() -> None:
+            key = random.randrange(100_000)
+            shared.save(key, key)
+
+        benchmark(save_to_cache)
@@ -0,0 +1,102 @@
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+from mycache.policies import LRU, Random
+from mycache.simulator import (
+    POLICIES, compare, format_results, loop, read_trace, scan_mixed,
+    shifting, simulate, zipf
+)
+from mycache.simulator.cli import main
+
+
+def test_zipf_is_skewed_and_reproducible() -> None:
+    keys = list(zipf(100, 10_000, seed=1))
+
+    assert len(keys) == 10_000
+    assert keys == list(zipf(100, 10_000, seed=1))
+    assert all(0 <= key < 100 for key in keys)
+
+    counts = Counter(keys)
+    assert counts[0] > counts[10] > counts[99]
+
+
+def test_scan_mixed_keys_are_requested_once() -> None:
+    keys = list(scan_mixed(100, 10_000, scan_ratio=0.3, seed=1))
+    scanned = [key for key in keys if key >= 100]
+
+    assert len(keys) == 10_000
+    assert 2_500 < len(scanned) < 3_500
+    assert len(scanned) == len(set(scanned))
+
+
+def test_loop() -> None:
+    assert list(loop(3, 7)) == [0, 1, 2, 0, 1, 2, 0]
+
+
+def test_shifting_hot_set_moves() -> None:
+    keys = list(shifting(1000, 4000, hot_ratio=0.01, phases=4, seed=1))
+    first = Counter(keys[:1000])
+    last = Counter(keys[3000:])
+
+    assert {key for key, _ in first.most_common(10)} <= set(range(10))
+    assert {key for key, _ in last.most_common(10)} <= set(range(30, 40))
+
+
+def test_read_trace(tmp_path: Path) -> None:
+    trace = tmp_path / "trace.txt"
+    trace.write_text("a\nb\n\n a \n", encoding="utf-8")
+
+    assert list(read_trace(str(trace))) == ["a", "b", "a"]
+
+
+def test_simulate_counts_hits() -> None:
+    result = simulate(LRU, 10, loop(10, 100))
+
+    assert result.policy == "LRU"
+    assert result.requests == 100
+    assert result.hits == 90
+    assert result.hit_ratio == 0.9
+    assert result.ops_per_second > 0
+    assert result.peak_memory > 0
+
+
+def test_loop_larger_than_cache() -> None:
+    lru = simulate(LRU, 10, loop(11, 1100), measure_memory=False)
+    random = simulate(Random, 10, loop(11, 1100), measure_memory=False)
+
+    assert lru.hits == 0
+    assert lru.peak_memory == 0
+    assert random.hits > 0
+
+
+def test_compare_every_policy_and_capacity() -> None:
+    results = compare(POLICIES, [10, 50], zipf(100, 1000, seed=1))
+
+    assert len(results) == 2 * len(POLICIES)
+    assert {(result.policy, result.capacity) for result in results} == {
+        (name, capacity) for name in POLICIES for capacity in [10, 50]
+    }
+    assert all(result.requests == 1000 for result in results)
+
+    table = format_results(results)
+    assert len(table.splitlines()) == len(results) + 1
+
+
+def test_cli(capsys: pytest.CaptureFixture, tmp_path: Path) -> None:
+    assert main([
+        "--workload", "loop", "--keys", "5", "--requests", "50",
+        "--capacity", "5", "--policy", "lru", "--no-memory",
+    ]) == 0
+
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 2
+    assert lines[1].split()[:3] == ["lru", "5", "0.9000"]
+
+    trace = tmp_path / "trace.txt"
+    trace.write_text("a\nb\na\n", encoding="utf-8")
+    main(["--trace", str(trace), "--capacity", "2", "--policy", "clock"])
+
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[1].split()[:3] == ["clock", "2", "0.3333"]
@@ -0,0 +1,25 @@
+from typing import Any
+
+import pytest
+
+from mycache.simulator import POLICIES, simulate, zipf
+
+
+KEYS = list(zipf(10_000, 100_000, seed=0))
+
+
+@pytest.mark.parametrize("name", sorted(POLICIES))
+@pytest.mark.parametrize("capacity", [100, 1_000])
+def test_zipf_simulation_performance(
+    benchmark: Any,
+    name: str,
+    capacity: int,
+) -> None:
+    result = benchmark.pedantic(
+        simulate,
+        args=(POLICIES[name], capacity, KEYS),
+        kwargs={"name": name, "measure_memory": False},
+        rounds=3,
+    )
+
+    benchmark.extra_info["hit_ratio"] = result.hit_ratio
@@ -0,0 +1,61 @@
+import threading
+import time
+from typing import Any, List
+
+import pytest
+
+from mycache.singleflight import SingleFlight
+
+
+def run_concurrently(count: int, target: Any) -> None:
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_single_flight_shares_result() -> None:
+    flight: SingleFlight[Any, int] = SingleFlight()
+    calls: List[int] = []
+    results: List[int] = []
+
+    def function() -> int:
+        calls.append(1)
+        time.sleep(0.05)
+        return 42
+
+    run_concurrently(8, lambda: results.append(flight.do(["key"], function)))
+
+    assert len(calls) == 1
+    assert results == [42] * 8
+
+
+def test_single_flight_shares_exception() -> None:
+    flight: SingleFlight[Any, int] = SingleFlight()
+    errors: List[BaseException] = []
+
+    def function() -> int:
+        time.sleep(0.05)
+        raise ValueError("failed")
+
+    def call() -> None:
+        try:
+            flight.do("key", function)
+        except ValueError as error:
+            errors.append(error)
+
+    run_concurrently(8, call)
+
+    assert len(errors) == 8
+    assert len(set(map(id, errors))) == 1
+
+
+def test_single_flight_forgets_finished_calls() -> None:
+    flight: SingleFlight[Any, int] = SingleFlight()
+
+    with pytest.raises(ValueError):
+        flight.do("key", lambda: int("x"))
+
+    assert flight.do("key", lambda: 1) == 1
+    assert flight.do("key", lambda: 2) == 2
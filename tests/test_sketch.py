@@ -0,0 +1,45 @@
+import pytest
+
+from mycache.sketch import CountMinSketch, key_hash
+
+
+def test_sketch_counts_keys() -> None:
+    sketch = CountMinSketch(256)
+
+    for _ in range(5):
+        sketch.add("hot")
+    sketch.add(["warm"])
+
+    assert sketch.frequency("hot") == 5
+    assert sketch.frequency(["warm"]) == 1
+    assert sketch.frequency("cold") == 0
+
+
+def test_sketch_caps_counters() -> None:
+    sketch = CountMinSketch(256)
+
+    for _ in range(100):
+        sketch.add("hot")
+
+    assert sketch.frequency("hot") == 15
+
+
+def test_sketch_halves_counters_periodically() -> None:
+    sketch = CountMinSketch(256, sample_size=10)
+
+    for _ in range(9):
+        sketch.add("hot")
+    assert sketch.frequency("hot") == 9
+
+    sketch.add("hot")
+    assert sketch.frequency("hot") == 5
+
+
+def test_sketch_checks_depth() -> None:
+    with pytest.raises(ValueError):
+        CountMinSketch(256, depth=0)
+
+
+def test_key_hash_of_unhashable_keys() -> None:
+    assert key_hash({"a": [1]}) == key_hash({"a": [1]})
+    assert key_hash(1) == hash(1)
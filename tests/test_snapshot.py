@@ -0,0 +1,183 @@
+import pickle
+from pathlib import Path
+from typing import Any, List
+
+import pytest
+from freezegun import freeze_time  # type: ignore
+
+from mycache import Cache, cache, cache_many
+from mycache.policies import (
+    ARC, CLOCK, LFU, LRU, Policy, Random, SIEVE, SLRU, WTinyLFU
+)
+
+
+def replacement_order(memo: Cache[Any, Any]) -> List[Any]:
+    order = []
+    while memo.size():
+        key = memo.replacement_policy.next_to_replace()
+        memo.remove(key)
+        order.append(key)
+
+    return order
+
+
+def test_dump_and_load(tmp_path: Path) -> None:
+    path = str(tmp_path / "snapshot")
+    memo: Cache[Any, Any] = Cache()
+    memo.save("a", 1)
+    memo.save([1, 2], {"b": 2})
+
+    assert memo.dump(path) == 2
+
+    restored: Cache[Any, Any] = Cache()
+    assert restored.load(path) == 2
+    assert restored.get("a") == 1
+    assert restored.get([1, 2]) == {"b": 2}
+    assert restored.stats().inserts == 2
+
+
+def test_load_keeps_time_left_and_drops_expired(tmp_path: Path) -> None:
+    path = str(tmp_path / "snapshot")
+
+    with freeze_time("2020-10-01 12:00:00"):
+        memo: Cache[Any, Any] = Cache()
+        memo.save("short", 1, expire_in=5)
+        memo.save("long", 2, expire_in=20)
+        memo.save("forever", 3)
+        memo.save("expired", 4, expire_in=1)
+
+    with freeze_time("2020-10-01 12:00:01"):
+        assert memo.dump(path) == 3
+
+    with freeze_time("2020-10-01 12:00:10"):
+        restored: Cache[Any, Any] = Cache()
+        assert restored.load(path) == 2
+        assert not restored.has("short")
+        assert restored.has("long")
+        assert restored.has("forever")
+
+    with freeze_time("2020-10-01 12:00:19"):
+        assert restored.has("long")
+
+    with freeze_time("2020-10-01 12:00:20"):
+        assert not restored.has("long")
+
+
+@pytest.mark.parametrize(
+    "policy_type", [LRU, LFU, WTinyLFU, SLRU, ARC, CLOCK, SIEVE],
+)
+def test_load_keeps_replacement_order(
+    tmp_path: Path,
+    policy_type: Any,
+) -> None:
+    path = str(tmp_path / "snapshot")
+    memo: Cache[Any, Any] = Cache(
+        max_items=10, replacement_policy=policy_type(),
+    )
+    for key in range(10):
+        memo.save(key, key)
+    memo.get(0)
+
+    memo.dump(path)
+    restored: Cache[Any, Any] = Cache(
+        max_items=10, replacement_policy=policy_type(),
+    )
+    restored.load(path)
+
+    order = replacement_order(restored)
+    assert sorted(order) == list(range(10))
+    assert order[-1] == 0 or policy_type in [WTinyLFU, CLOCK, SIEVE]
+    if policy_type is LRU:
+        assert order == replacement_order(memo)
+
+
+def test_load_into_smaller_cache(tmp_path: Path) -> None:
+    path = str(tmp_path / "snapshot")
+    memo: Cache[Any, Any] = Cache(replacement_policy=LRU())
+    for key in range(10):
+        memo.save(key, key)
+    memo.dump(path)
+
+    restored: Cache[Any, Any] = Cache(max_items=3, replacement_policy=LRU())
+    restored.save("old", 0)
+    assert restored.load(path) == 3
+
+    assert replacement_order(restored) == [7, 8, 9]
+
+
+def test_load_respects_max_weight(tmp_path: Path) -> None:
+    path = str(tmp_path / "snapshot")
+    memo: Cache[Any, Any] = Cache(replacement_policy=LRU())
+    for key in range(10):
+        memo.save(key, key)
+    memo.dump(path)
+
+    restored: Cache[Any, Any] = Cache(
+        max_weight=3, weigher=lambda key, value: 1, replacement_policy=LRU(),
+    )
+    restored.load(path)
+
+    assert restored.weight() == 3
+    assert replacement_order(restored) == [7, 8, 9]
+
+
+def test_load_many_batches(tmp_path: Path) -> None:
+    path = str(tmp_path / "snapshot")
+    memo: Cache[Any, Any] = Cache(replacement_policy=LRU())
+    memo.save_many((key, str(key)) for key in range(5000))
+    memo.dump(path)
+
+    restored: Cache[Any, Any] = Cache(replacement_policy=LRU())
+    assert restored.load(path) == 5000
+    assert replacement_order(restored) == list(range(5000))
+
+
+def test_load_invalid_snapshot(tmp_path: Path) -> None:
+    path = tmp_path / "snapshot"
+    path.write_bytes(pickle.dumps({"not": "snapshot"}))
+
+    with pytest.raises(ValueError):
+        Cache().load(str(path))
+
+
+def test_policy_without_order() -> None:
+    policy: Policy[Any] = Random()
+    assert policy.order() is None
+
+
+def test_decorator_warm_restart(tmp_path: Path) -> None:
+    path = str(tmp_path / "snapshot")
+    calls = []
+
+    def function(x: int, y: int = 0) -> int:
+        calls.append(x)
+        return x + y
+
+    cached = cache()(function)
+    cached(1)
+    cached(2, y=3)
+    assert cached.cache_dump(path) == 2  # type: ignore
+
+    restarted = cache()(function)
+    assert restarted.cache_load(path) == 2  # type: ignore
+    assert restarted(1) == 1
+    assert restarted(2, y=3) == 5
+    assert calls == [1, 2]
+
+
+def test_cache_many_warm_restart(tmp_path: Path) -> None:
+    path = str(tmp_path / "snapshot")
+
+    @cache_many()
+    def function(keys: List[int]) -> List[int]:
+        return keys
+
+    function([1, 2])
+    function.cache_dump(path)  # type: ignore
+
+    @cache_many()
+    def restarted(keys: List[int]) -> List[int]:
+        raise AssertionError("must not be called")
+
+    restarted.cache_load(path)  # type: ignore
+    assert restarted([2, 1]) == [2, 1]
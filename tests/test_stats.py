@@ -0,0 +1,100 @@
+from typing import Any
+
+import pytest
+
+from mycache import Cache, ShardedCache, cache
+from mycache.clock import ManualClock
+from mycache.policies import LRU
+from mycache.stats import CacheStats, LatencyHistogram
+
+
+def test_cache_counts_lookups() -> None:
+    clock = ManualClock()
+    memo: Cache[Any, Any] = Cache(
+        max_items=2, clock=clock, replacement_policy=LRU(),
+    )
+
+    memo.save("1", 1, expire_in=10)
+    memo.save("2", 2)
+    memo.save("2", 22)
+    memo.get("1")
+    with pytest.raises(KeyError):
+        memo.get("3")
+
+    clock.advance(10)
+    with pytest.raises(KeyError):
+        memo.get("1")
+
+    memo.save("3", 3)
+    memo.save("4", 4)
+    memo.get_many(["3", "4", "5"])
+
+    assert memo.stats() == CacheStats(
+        hits=3,
+        misses=3,
+        inserts=4,
+        evictions=1,
+        expirations=1,
+        size=2,
+    )
+
+    memo.reset_stats()
+    assert memo.stats() == CacheStats(0, 0, 0, 0, 0, 2)
+
+
+def test_sharded_cache_sums_stats() -> None:
+    memo: ShardedCache[Any, Any] = ShardedCache(shards=4)
+    for key in range(10):
+        memo.save(key, key)
+        memo.get(key)
+
+    assert memo.stats() == CacheStats(10, 0, 10, 0, 0, 10)
+
+    memo.reset_stats()
+    assert memo.stats() == CacheStats(0, 0, 0, 0, 0, 10)
+
+
+def test_decorated_function_stats() -> None:
+    @cache(latency_histogram=True)
+    def function(x: int) -> int:
+        return x
+
+    function(1)
+    function(1)
+    function(2)
+
+    stats = function.cache_stats()  # type: ignore
+    assert (stats.hits, stats.misses, stats.size) == (1, 2, 2)
+    assert function.cache_latency.total() == 2  # type: ignore
+
+    function.cache_reset_stats()  # type: ignore
+    assert function.cache_stats().misses == 0  # type: ignore
+    assert function.cache_latency.total() == 0  # type: ignore
+
+
+def test_decorated_function_without_histogram() -> None:
+    @cache()
+    def function(x: int) -> int:
+        return x
+
+    function(1)
+    assert function.cache_latency is None  # type: ignore
+    assert function.cache_stats().inserts == 1  # type: ignore
+
+
+def test_latency_histogram() -> None:
+    histogram = LatencyHistogram(buckets=8)
+
+    histogram.record(0.0000005)
+    histogram.record(0.000003)
+    histogram.record(0.000003)
+    histogram.record(10)
+
+    assert histogram.counts() == [1, 0, 2, 0, 0, 0, 0, 1]
+    assert histogram.total() == 4
+    assert histogram.percentile(0.5) == 0.000004
+    assert histogram.percentile(1.0) == 0.000128
+
+    histogram.reset()
+    assert histogram.total() == 0
+    assert histogram.percentile(0.5) == 0.0